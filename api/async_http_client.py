@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+
+from api.http_client import _record_latency
+from config import (
+    UPSTREAM_BASE_URL,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_BACKOFF_FACTOR,
+    ASYNC_UPSTREAM_MAX_CONNECTIONS,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_client = None
+
+def get_async_client():
+    """
+    Returns the shared httpx.AsyncClient used by the async serving mode.
+    Must be called from inside the running event loop.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=UPSTREAM_BASE_URL,
+            timeout=httpx.Timeout(UPSTREAM_READ_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=ASYNC_UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_UPSTREAM_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _retry_delay(attempt, response=None):
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return UPSTREAM_BACKOFF_FACTOR * (2 ** attempt)
+
+async def async_upstream_get(endpoint, params=None):
+    """
+    Async counterpart of api.http_client.upstream_get: sends a GET to an upstream
+    endpoint through the shared AsyncClient, retrying transport errors and retryable
+    statuses with backoff, and records its latency under the same counters.
+
+    :return: The httpx.Response object.
+    """
+    client = get_async_client()
+    start = time.perf_counter()
+    failed = True
+    try:
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            last_attempt = attempt == UPSTREAM_MAX_RETRIES
+            try:
+                response = await client.get(f"/{endpoint}", params=params)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(_retry_delay(attempt, response))
+                continue
+
+            failed = response.status_code >= 400
+            return response
+    finally:
+        _record_latency(endpoint, time.perf_counter() - start, failed)
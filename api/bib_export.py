@@ -0,0 +1,100 @@
+import argparse
+import re
+import sys
+
+from api.bibtex import fetch_bibtex_text
+from api.concurrency import iter_fan_out
+from api.paper_index import lookup_papers
+from config import BIB_EXPORT_MAX_WORKERS
+
+_ENTRY_KEY_RE = re.compile(r"^(\s*@\w+\s*\{\s*)([^,\s]+)(\s*,)")
+
+def _suffix(n):
+    """a, b, ..., z, aa, ab, ... as BibTeX disambiguation suffixes."""
+    letters = ""
+    n += 1
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("a") + rem) + letters
+    return letters
+
+class CitationKeyDeduper:
+    """Renames repeated citation keys (smith2020 -> smith2020a, smith2020b, ...) so a .bib file stays valid."""
+
+    def __init__(self):
+        self._used = set()
+
+    def unique_entry(self, entry):
+        match = _ENTRY_KEY_RE.match(entry)
+        if not match:
+            return entry
+        key = match.group(2)
+        new_key, n = key, 0
+        while new_key in self._used:
+            new_key = key + _suffix(n)
+            n += 1
+        self._used.add(new_key)
+        if new_key == key:
+            return entry
+        return entry[:match.start(2)] + new_key + entry[match.end(2):]
+
+def _is_entry(text):
+    return isinstance(text, str) and text.lstrip().startswith("@")
+
+def iter_bib_entries(paper_ids, papers=None, use_gpt_fallback=False, max_workers=BIB_EXPORT_MAX_WORKERS):
+    """
+    Resolves BibTeX for every paper concurrently and yields .bib text chunks one entry at a
+    time, as lookups finish. Citation keys are made unique across the export, and papers
+    that could not be resolved are listed as comments instead of breaking the file.
+
+    :param paper_ids: Paper IDs to export (repeats are exported once).
+    :param papers: Optional paper dicts. They give each paper's CorpusId for the lookup and are
+        used to build entries locally when it fails. Without them, papers seen in earlier searches
+        are looked up in the local paper index.
+    """
+    if not papers:
+        papers = lookup_papers(paper_ids)
+    deduper = CitationKeyDeduper()
+    exported = failed = 0
+    for pid, text, error in iter_fan_out(lambda pid: fetch_bibtex_text(pid, papers, use_gpt_fallback), paper_ids, max_workers):
+        if error is None and _is_entry(text):
+            exported += 1
+            yield deduper.unique_entry(text.strip()) + "\n\n"
+        else:
+            failed += 1
+            reason = str(error) if error is not None else ((text or "").strip().splitlines() or ["no entry returned"])[0]
+            yield f"% Could not resolve BibTeX for {pid}: {reason}\n\n"
+    yield f"% Exported {exported} entries ({failed} unresolved)\n"
+
+def write_bib_file(paper_ids, out, papers=None, use_gpt_fallback=False, max_workers=BIB_EXPORT_MAX_WORKERS):
+    """Streams the export into an open text file and returns it."""
+    for chunk in iter_bib_entries(paper_ids, papers, use_gpt_fallback, max_workers):
+        out.write(chunk)
+        out.flush()
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export BibTeX for many papers as one .bib file.")
+    parser.add_argument("paper_ids", nargs="*", help="Paper IDs to export")
+    parser.add_argument("-i", "--input", help="File with one paper ID per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="Output .bib file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=BIB_EXPORT_MAX_WORKERS, help="Concurrent lookups")
+    args = parser.parse_args(argv)
+
+    paper_ids = list(args.paper_ids)
+    if args.input:
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        with source:
+            paper_ids += [line.strip() for line in source if line.strip() and not line.startswith("#")]
+    if not paper_ids:
+        parser.error("no paper IDs given")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            write_bib_file(paper_ids, out, max_workers=args.workers)
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        write_bib_file(paper_ids, sys.stdout, max_workers=args.workers)
+
+if __name__ == "__main__":
+    main()
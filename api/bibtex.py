@@ -1,10 +1,20 @@
-import requests
-from openai import OpenAI
 import os
-from config import get_openai_api_key
 
-os.environ["OPENAI_API_KEY"] = get_openai_api_key()
-client = OpenAI()
+from api.llm_cache import cached_chat_completion
+from config import BIBTEX_GPT_FALLBACK, BATCH_MAX_WORKERS, CACHE_DIR, BIBTEX_CACHE_TTL, BIBTEX_CACHE_MAX_ENTRIES
+from api.http_client import upstream_get
+from api.bibtex_builder import build_bibtex
+from api.concurrency import fan_out
+from api.singleflight import SingleFlight
+from api.disk_cache import DiskCache
+
+_bibtex_flight = SingleFlight()
+# Entries returned by the bibtex endpoint, keyed by lookup ID (locally built or GPT entries are not stored)
+_bibtex_cache = DiskCache(
+    os.path.join(CACHE_DIR, "bibtex.sqlite3"),
+    ttl=BIBTEX_CACHE_TTL,
+    max_entries=BIBTEX_CACHE_MAX_ENTRIES,
+)
 
 def format_bibtex_box(content):
     html = f"""
@@ -15,34 +25,9 @@ def format_bibtex_box(content):
     """
     return html
 
-def get_bibtex(paper_ids, paper_title_map, papers=None):
-    """
-    Tries to retrieve BibTeX for each paper using the ID.
-    If retrieval fails and papers are provided, sends paper info to GPT-4o to format a citation.
-    """
-    lookup_bibtex_url = "http://recommendpapers.xyz/api/bibtex"
-    if not paper_ids:
-        return "<div>No papers available.</div>"
-
-    all_bibtex_html = ""
-    for pid in paper_ids:
-        paper_title = paper_title_map.get(pid, pid)
-        url = f"{lookup_bibtex_url}?id=CorpusId:{pid}"
-        try:
-            resp = requests.get(url)
-            data = resp.json()
-            results = data.get("papers", [])
-            if results:
-                bibtex_text = results[0].get("bibtex", "No BibTeX found.")
-            else:
-                raise Exception("BibTeX not found in API response")
-        except Exception as e:
-            # If papers info is available, try GPT fallback
-            if papers:
-                matched = next((p for p in papers if str(p.get("id")) == str(pid)), None)
-                if matched:
-                    try:
-                        prompt = f"""
+def _gpt_bibtex(matched):
+    """Asks GPT-4o to format a BibTeX entry from the paper metadata."""
+    prompt = f"""
 Please generate a BibTeX citation entry for the following paper information:
 
 Title: {matched.get("title", "Unknown Title")}
@@ -53,19 +38,87 @@ External IDs: {matched.get("external_ids", {})}
 
 Ensure it's well-structured and ready to be used in academic BibTeX format.
 """
-                        completion = client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[{"role": "user", "content": prompt}]
-                        )
-                        bibtex_text = completion.choices[0].message.content
-                    except Exception as gpt_e:
-                        bibtex_text = f"❌ GPT Fallback failed: {str(gpt_e)}"
-                else:
-                    bibtex_text = f"❌ Error retrieving BibTeX for paper {pid}: {str(e)}"
-            else:
-                bibtex_text = f"❌ Error retrieving BibTeX for paper {pid}: {str(e)}"
+    return cached_chat_completion([{"role": "user", "content": prompt}])
+
+def fetch_bibtex_text(pid, papers=None, use_gpt_fallback=BIBTEX_GPT_FALLBACK):
+    """
+    Tries to retrieve the BibTeX entry for a single paper using its CorpusId.
+    If retrieval fails and papers are provided, builds the entry locally from the paper metadata.
+    GPT-4o is only used as a last resort when use_gpt_fallback is set and the local builder
+    has nothing to work with. Entries from the endpoint are cached on disk, and concurrent
+    requests for the same paper share one lookup.
+    """
+    return _bibtex_flight.do((str(pid), use_gpt_fallback, bool(papers)), _fetch_bibtex_text, pid, papers, use_gpt_fallback)
+
+def _bibtex_lookup_id(pid, matched):
+    """
+    The ID sent to the bibtex endpoint. A CorpusId differs from the paperId used elsewhere, so
+    "CorpusId:<n>" is only used when the CorpusId is known (or the ID is numeric, i.e. already one);
+    otherwise the paperId is sent as is.
+    """
+    corpus_id = ((matched or {}).get("external_ids") or {}).get("CorpusId")
+    if corpus_id in (None, "", "Unknown") and str(pid).isdigit():
+        corpus_id = pid
+    if corpus_id in (None, "", "Unknown"):
+        return str(pid)
+    return f"CorpusId:{corpus_id}"
 
-        bibtex_html = f"<h3>BibTeX for {paper_title}</h3><pre>{bibtex_text}</pre><hr>"
-        all_bibtex_html += bibtex_html
+def _fetch_bibtex_text(pid, papers, use_gpt_fallback):
+    matched = None
+    if papers:
+        matched = next((p for p in papers if str(p.get("id")) == str(pid)), None)
+
+    lookup_id = _bibtex_lookup_id(pid, matched)
+    cached = _bibtex_cache.get(lookup_id)
+    if cached is not None:
+        return cached
+    try:
+        resp = upstream_get("bibtex", params={"id": lookup_id})
+        data = resp.json()
+        results = data.get("papers", [])
+        if results and results[0].get("bibtex"):
+            _bibtex_cache.set(lookup_id, results[0]["bibtex"])
+            return results[0]["bibtex"]
+        # A record without an entry is a miss like any other, so it falls through to the local builder
+        raise Exception("No BibTeX found." if results else "BibTeX not found in API response")
+    except Exception as e:
+        bibtex_text = build_bibtex(matched) if matched else None
+        if bibtex_text is None and matched and use_gpt_fallback:
+            try:
+                bibtex_text = _gpt_bibtex(matched)
+            except Exception as gpt_e:
+                bibtex_text = f"❌ GPT Fallback failed: {str(gpt_e)}"
+        if bibtex_text is None:
+            bibtex_text = f"❌ Error retrieving BibTeX for paper {pid}: {str(e)}"
+        return bibtex_text
+
+def format_bibtex_fragment(paper_title, bibtex_text):
+    return f"<h3>BibTeX for {paper_title}</h3><pre>{bibtex_text}</pre><hr>"
+
+def get_bibtex_batch(paper_ids, paper_title_map, papers=None, use_gpt_fallback=BIBTEX_GPT_FALLBACK, max_workers=BATCH_MAX_WORKERS):
+    """
+    Retrieves BibTeX for many papers at once and returns {paper_id: BibTeX HTML},
+    with each value wrapped in its own BibTeX box.
+
+    The bibtex endpoint only accepts one ID per request, so the lookups fan out
+    concurrently behind this call.
+    """
+    entries = fan_out(lambda pid: fetch_bibtex_text(pid, papers, use_gpt_fallback), paper_ids, max_workers)
+    return {
+        pid: format_bibtex_box(format_bibtex_fragment(paper_title_map.get(pid, pid), text))
+        for pid, text in entries.items()
+    }
+
+def get_bibtex(paper_ids, paper_title_map, papers=None, use_gpt_fallback=BIBTEX_GPT_FALLBACK):
+    """
+    Retrieves BibTeX for each paper (see fetch_bibtex_text) and combines
+    the entries into a single HTML box.
+    """
+    if not paper_ids:
+        return "<div>No papers available.</div>"
 
+    entries = fan_out(lambda pid: fetch_bibtex_text(pid, papers, use_gpt_fallback), paper_ids, BATCH_MAX_WORKERS)
+    all_bibtex_html = "".join(
+        format_bibtex_fragment(paper_title_map.get(pid, pid), entries[pid]) for pid in paper_ids
+    )
     return format_bibtex_box(all_bibtex_html)
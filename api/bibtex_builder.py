@@ -0,0 +1,98 @@
+import re
+import unicodedata
+
+# Characters that must be escaped inside BibTeX field values
+_LATEX_ESCAPES = {
+    "\\": r"\textbackslash{}",
+    "{": r"\{",
+    "}": r"\}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+
+_KEY_STOPWORDS = {"a", "an", "the", "on", "of", "in", "for", "and", "to", "with", "towards", "toward", "via", "from"}
+
+def escape_latex(text):
+    """Escapes LaTeX special characters so the value is safe inside a BibTeX field."""
+    return "".join(_LATEX_ESCAPES.get(ch, ch) for ch in str(text))
+
+def _ascii_slug(text):
+    normalized = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]", "", normalized.lower())
+
+def make_citation_key(paper):
+    """
+    Builds a stable citation key such as "vaswani2017attention" from the
+    first author's surname, the year (when known) and the first significant title word.
+    """
+    authors = paper.get("authors") or []
+    surname = _ascii_slug(authors[0].split()[-1]) if authors and authors[0].split() else ""
+
+    title_word = ""
+    for word in re.split(r"\W+", str(paper.get("title", ""))):
+        slug = _ascii_slug(word)
+        if slug and slug not in _KEY_STOPWORDS:
+            title_word = slug
+            break
+
+    year = str(paper.get("year") or "")
+    key = f"{surname or 'anon'}{year}{title_word}"
+
+    # Fall back to the paper's own ID when neither author nor title give anything usable
+    if key == "anon":
+        key += _ascii_slug(paper.get("id", ""))[:12]
+    return key
+
+def build_bibtex(paper):
+    """
+    Builds a BibTeX entry locally from a search_papers record (title, authors,
+    external_ids and PDF URL). Returns None when the record has no usable title.
+
+    :param paper: Paper dict as returned by search_papers.
+    :return: The BibTeX entry as a string, or None.
+    """
+    title = paper.get("title")
+    if not title or title == "Unknown Title":
+        return None
+
+    external_ids = paper.get("external_ids") or {}
+    doi = external_ids.get("DOI")
+    arxiv_id = external_ids.get("ArXiv")
+    corpus_id = external_ids.get("CorpusId")
+
+    pdf_url = paper.get("pdf")
+    if not pdf_url or pdf_url == "No PDF available":
+        pdf_url = None
+
+    fields = [("title", "{" + escape_latex(title) + "}")]
+
+    authors = [a for a in paper.get("authors") or [] if a and a != "Unknown"]
+    if authors:
+        fields.append(("author", " and ".join(escape_latex(a) for a in authors)))
+    if paper.get("year"):
+        fields.append(("year", str(paper["year"])))
+    if paper.get("venue"):
+        fields.append(("howpublished", escape_latex(paper["venue"])))
+    if doi:
+        fields.append(("doi", doi))
+    if arxiv_id:
+        fields.append(("eprint", arxiv_id))
+        fields.append(("archivePrefix", "arXiv"))
+
+    url = pdf_url
+    if not url and doi:
+        url = f"https://doi.org/{doi}"
+    elif not url and arxiv_id:
+        url = f"https://arxiv.org/abs/{arxiv_id}"
+    if url:
+        fields.append(("url", url))
+    if corpus_id:
+        fields.append(("note", f"Semantic Scholar CorpusId: {corpus_id}"))
+
+    body = ",\n".join(f"  {name} = {{{value}}}" for name, value in fields)
+    return f"@misc{{{make_citation_key(paper)},\n{body}\n}}"
@@ -0,0 +1,202 @@
+from array import array
+
+from api.citations import fetch_citation_page
+from api.concurrency import iter_fan_out
+from config import GRAPH_MAX_HOPS, GRAPH_FANOUT_PER_NODE, GRAPH_MAX_NODES, GRAPH_MAX_WORKERS
+
+class CitationGraph:
+    """
+    A compact citation graph. Papers get integer node IDs in the order they are discovered,
+    per-node data lives in parallel lists, and edges (citing -> cited) are kept in two int arrays.
+    Repeated edges are only dropped when the arrays are turned into CSR adjacency.
+    """
+
+    def __init__(self):
+        self.paper_ids = []
+        self.titles = []
+        self.citation_counts = []
+        self.hops = []
+        self._index = {}
+        self.edge_src = array("i")
+        self.edge_dst = array("i")
+
+    def __len__(self):
+        return len(self.paper_ids)
+
+    def node(self, paper_id):
+        """Returns the node ID of a paper, or None if it is not in the graph."""
+        return self._index.get(str(paper_id))
+
+    def add_node(self, paper_id, title="", citation_count=0, hop=0):
+        """Adds a paper if it is new and returns its node ID."""
+        paper_id = str(paper_id)
+        node = self._index.get(paper_id)
+        if node is not None:
+            return node
+        node = len(self.paper_ids)
+        self._index[paper_id] = node
+        self.paper_ids.append(paper_id)
+        self.titles.append(title)
+        self.citation_counts.append(citation_count or 0)
+        self.hops.append(hop)
+        return node
+
+    def add_edge(self, src, dst):
+        if src == dst:
+            return
+        self.edge_src.append(src)
+        self.edge_dst.append(dst)
+
+    def out_adjacency(self):
+        """
+        Returns the outgoing edges in CSR form: (offsets, targets), where the targets of
+        node n are targets[offsets[n]:offsets[n + 1]], sorted and without repeats.
+        """
+        n = len(self.paper_ids)
+        offsets = array("i", [0] * (n + 1))
+        for src in self.edge_src:
+            offsets[src + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        targets = array("i", [0] * len(self.edge_src))
+        cursor = array("i", offsets[:n])
+        for src, dst in zip(self.edge_src, self.edge_dst):
+            targets[cursor[src]] = dst
+            cursor[src] += 1
+
+        # Compact each node's slice in place, dropping repeated edges
+        write = 0
+        for node in range(n):
+            start, end = offsets[node], offsets[node + 1]
+            offsets[node] = write
+            for dst in sorted(set(targets[start:end])):
+                targets[write] = dst
+                write += 1
+        offsets[n] = write
+        del targets[write:]
+        return offsets, targets
+
+    def in_degrees(self, adjacency=None):
+        _, targets = adjacency or self.out_adjacency()
+        degrees = array("i", [0] * len(self.paper_ids))
+        for dst in targets:
+            degrees[dst] += 1
+        return degrees
+
+    def pagerank(self, adjacency=None, damping=0.85, iterations=30, tolerance=1e-6):
+        """Scores every node with PageRank over citation edges, so rank flows to cited papers."""
+        n = len(self.paper_ids)
+        if n == 0:
+            return []
+        offsets, targets = adjacency or self.out_adjacency()
+        ranks = [1.0 / n] * n
+        for _ in range(iterations):
+            new_ranks = [(1.0 - damping) / n] * n
+            dangling = 0.0
+            for node in range(n):
+                start, end = offsets[node], offsets[node + 1]
+                if start == end:
+                    dangling += ranks[node]
+                    continue
+                share = damping * ranks[node] / (end - start)
+                for i in range(start, end):
+                    new_ranks[targets[i]] += share
+            # Papers that cite nothing in the graph spread their rank evenly
+            dangling_share = damping * dangling / n
+            new_ranks = [r + dangling_share for r in new_ranks]
+            delta = sum(abs(a - b) for a, b in zip(new_ranks, ranks))
+            ranks = new_ranks
+            if delta < tolerance:
+                break
+        return ranks
+
+def build_citation_graph(seed_ids, paper_title_map=None, hops=GRAPH_MAX_HOPS, fanout=GRAPH_FANOUT_PER_NODE,
+                         max_nodes=GRAPH_MAX_NODES, max_workers=GRAPH_MAX_WORKERS):
+    """
+    Crawls citing papers breadth-first from the seed papers, up to `hops` levels out.
+
+    Each node follows at most `fanout` citing papers (one lookup_citations page), each paper is
+    looked up once however many paths reach it, at most `max_workers` lookups run at a time across
+    the whole crawl, and no new nodes are added once the graph holds `max_nodes` papers.
+    """
+    paper_title_map = paper_title_map or {}
+    graph = CitationGraph()
+    frontier = [graph.add_node(pid, paper_title_map.get(pid, pid), hop=0) for pid in dict.fromkeys(map(str, seed_ids))]
+    expanded = set()
+
+    for hop in range(1, hops + 1):
+        to_expand = [node for node in frontier if node not in expanded]
+        if not to_expand:
+            break
+        expanded.update(to_expand)
+        print(f"[GRAPH] Hop {hop}: expanding {len(to_expand)} papers ({len(graph)} nodes so far)")
+
+        next_frontier = []
+        lookup = lambda node: fetch_citation_page(graph.paper_ids[node], 0, fanout)["citations"]
+        for cited, citations, error in iter_fan_out(lookup, to_expand, max_workers):
+            if error is not None:
+                print(f"[GRAPH] Citation lookup failed for {graph.paper_ids[cited]}: {error}")
+                continue
+            for citation in citations[:fanout]:
+                citing = citation.get("citingPaper") or {}
+                citing_id = citing.get("paperId")
+                if not citing_id:
+                    continue
+                node = graph.node(citing_id)
+                if node is None:
+                    if len(graph) >= max_nodes:
+                        continue
+                    node = graph.add_node(citing_id, citing.get("title") or "No Title", citing.get("citationCount"), hop)
+                    next_frontier.append(node)
+                graph.add_edge(node, cited)
+        frontier = next_frontier
+    return graph
+
+def most_central_papers(graph, top_k=10, include_seeds=False):
+    """
+    Ranks the graph's papers by PageRank (ties broken by in-graph and overall citation counts).
+    Returns a list of {"id", "title", "citations", "in_degree", "hop", "score"} dicts.
+    """
+    adjacency = graph.out_adjacency()
+    ranks = graph.pagerank(adjacency)
+    in_degrees = graph.in_degrees(adjacency)
+    nodes = [n for n in range(len(graph)) if include_seeds or graph.hops[n] > 0]
+    nodes.sort(key=lambda n: (ranks[n], in_degrees[n], graph.citation_counts[n]), reverse=True)
+    return [
+        {
+            "id": graph.paper_ids[n],
+            "title": graph.titles[n],
+            "citations": graph.citation_counts[n],
+            "in_degree": in_degrees[n],
+            "hop": graph.hops[n],
+            "score": ranks[n],
+        }
+        for n in nodes[:top_k]
+    ]
+
+def explore_citation_graph(seed_ids, paper_title_map=None, top_k=10, **kwargs):
+    """Builds the citation graph around the seed papers and returns its most central papers."""
+    graph = build_citation_graph(seed_ids, paper_title_map, **kwargs)
+    print(f"[GRAPH] {len(graph)} nodes, {len(graph.edge_src)} edges")
+    return most_central_papers(graph, top_k)
+
+def format_graph_html(central_papers, seed_titles):
+    """Renders the most central papers of a citation graph as an HTML box."""
+    if not central_papers:
+        content = "<p>No citing papers found.</p>"
+    else:
+        content = f"<p>Most central papers citing (directly or indirectly) {', '.join(seed_titles)}:</p>"
+        for rank, paper in enumerate(central_papers, start=1):
+            content += f"""
+                <div class="single-citation">
+                    <span>{rank}. <strong>{paper['title']}</strong></span><br>
+                    <span>&nbsp;&nbsp;Cited by {paper['in_degree']} papers in the graph · {paper['citations']} citations overall · {paper['hop']} hop(s) out</span>
+                </div>
+                """
+    return f"""
+    <div class="citation-box">
+        <h2>Citation Graph</h2>
+        {content}
+    </div>
+    """
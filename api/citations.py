@@ -1,4 +1,23 @@
-import requests
+import os
+import threading
+
+from api.http_client import upstream_get
+from api.concurrency import fan_out
+from api.disk_cache import DiskCache
+from api.singleflight import SingleFlight
+from config import BATCH_MAX_WORKERS, CACHE_DIR, CITATION_CACHE_TTL, CITATION_CACHE_MAX_ENTRIES, CITATION_PAGE_SIZE
+
+CITATION_FIELDS = "contexts,intents,citationCount,referenceCount,title,authors"
+
+FIRST_PAGE_SIZE = 3
+
+_citation_pages = DiskCache(
+    os.path.join(CACHE_DIR, "citation_pages.sqlite3"),
+    ttl=CITATION_CACHE_TTL,
+    max_entries=CITATION_CACHE_MAX_ENTRIES,
+)
+# Concurrent requests for the same page share one upstream call
+_citation_page_flight = SingleFlight()
 
 def format_citations_box(content):
     html = f"""
@@ -9,46 +28,136 @@ def format_citations_box(content):
     """
     return html
 
+def _fetch_citation_page(pid, offset, limit):
+    params = {"id": pid, "offset": offset, "limit": limit, "fields": CITATION_FIELDS}
+    resp = upstream_get("lookup_citations", params=params)
+    # upstream_get does not raise on 429/5xx; an error must never be cached as an empty page
+    resp.raise_for_status()
+    data = resp.json()
+    citations = data.get("citations", []) or []
+
+    next_offset = data.get("next")
+    if next_offset is None and len(citations) >= limit:
+        next_offset = offset + limit
+    page = {"citations": citations, "next": next_offset}
+    _citation_pages.set(_page_key(pid, offset, limit), page)
+    return page
+
+def _page_key(pid, offset, limit):
+    return f"{pid}:{offset}:{limit}"
+
+def fetch_citation_page(pid, offset=0, limit=FIRST_PAGE_SIZE):
+    """
+    Returns one page of citing papers as {"citations": [...], "next": next_offset or None}.
+    Pages are cached by (paperId, offset, limit).
+    """
+    page = _citation_pages.get(_page_key(pid, offset, limit))
+    if page is not None:
+        return page
+    return _citation_page_flight.do((pid, offset, limit), _fetch_citation_page, pid, offset, limit)
+
+def prefetch_citation_page(pid, offset, limit):
+    """Warms the cache for a page on a daemon thread, e.g. the next page while the user reads this one."""
+    if offset is None or _citation_pages.get(_page_key(pid, offset, limit)) is not None:
+        return
+
+    def warm():
+        try:
+            fetch_citation_page(pid, offset, limit)
+        except Exception as e:
+            print(f"[CITATIONS] Prefetch failed for {pid} at offset {offset}: {e}")
+
+    threading.Thread(target=warm, daemon=True).start()
+
+def render_citation_items(citations):
+    """Renders citing papers as HTML entries."""
+    items_html = ""
+    for citation in citations:
+        citing = citation.get("citingPaper", {})
+        citing_title = citing.get("title", "No Title")
+        citing_authors = ", ".join([author.get("name", "Unknown") for author in citing.get("authors", [])])
+        contexts = citation.get("contexts", [])
+        context_text = "<br>".join([f"&nbsp;&nbsp;- {ctx}" for ctx in contexts]) if contexts else "&nbsp;&nbsp;- No context provided."
+        items_html += f"""
+                            <div class="single-citation">
+                                <span>* <strong>{citing_title}</strong></span><br>
+                                <span>&nbsp;&nbsp;Authors: {citing_authors}</span><br>
+                                <span>&nbsp;&nbsp;Contexts:</span><br>
+                                <div class="citation-context">{context_text}</div>
+                            </div>
+                            """
+    return items_html
+
+def fetch_citations_fragment(pid, paper_title):
+    """
+    Calls the lookup_citations endpoint for a single paper and returns its first
+    citations as an HTML fragment (without the surrounding citation box).
+    """
+    citations_html = f"<h3>Citations for {paper_title}</h3>"
+    try:
+        page = fetch_citation_page(pid, 0, FIRST_PAGE_SIZE)
+        if page["citations"]:
+            citations_html += render_citation_items(page["citations"])
+        else:
+            citations_html += "<p>No citations found.</p>"
+        return f"<div class='citation-block'>{citations_html}</div><div class='citation-divider'></div>"
+    except Exception as e:
+        return f"<p>Error retrieving citations for paper {pid}: {str(e)}</p><hr>"
+
+def fetch_more_citations_fragment(pid, paper_title, offset, limit=CITATION_PAGE_SIZE):
+    """
+    Fetches the page of citations starting at `offset` and renders it as an HTML fragment.
+    The following page is prefetched in the background.
+
+    :return: (fragment HTML, next offset or None when there are no more citations)
+    """
+    try:
+        page = fetch_citation_page(pid, offset, limit)
+    except Exception as e:
+        return f"<p>Error retrieving more citations for paper {pid}: {str(e)}</p><hr>", offset
+
+    prefetch_citation_page(pid, page["next"], limit)
+    if not page["citations"]:
+        return "", None
+    citations_html = f"<h3>More citations for {paper_title} ({offset + 1}–{offset + len(page['citations'])})</h3>"
+    citations_html += render_citation_items(page["citations"])
+    return f"<div class='citation-block'>{citations_html}</div><div class='citation-divider'></div>", page["next"]
+
+def get_citations_batch(paper_ids, paper_title_map, max_workers=BATCH_MAX_WORKERS):
+    """
+    Fetches citations for many papers at once and returns {paper_id: citations HTML},
+    with each value wrapped in its own citation box.
+
+    lookup_citations only accepts one paper per request, so the lookups fan out
+    concurrently behind this call.
+
+    :param paper_ids: List of paper IDs (strings).
+    :param paper_title_map: Dict mapping paper_id to paper title.
+    :param max_workers: Maximum number of concurrent upstream requests.
+    """
+    fragments = fan_out(
+        lambda pid: fetch_citations_fragment(pid, paper_title_map.get(pid, pid)),
+        paper_ids,
+        max_workers,
+    )
+    return {pid: format_citations_box(fragment) for pid, fragment in fragments.items()}
+
 def get_citations(paper_ids, paper_title_map):
     """
     For each paper in paper_ids, call the lookup_citations endpoint
     to fetch 3 citations, and then format the results in HTML.
-    
+
     :param paper_ids: List of paper IDs (strings).
     :param paper_title_map: Dict mapping paper_id to paper title.
     :return: A formatted HTML string with citations.
     """
     if not paper_ids:
         return "<div>No papers available.</div>"
-    
-    all_citations_html = ""
-    for pid in paper_ids:
-        paper_title = paper_title_map.get(pid, pid)
-        citations_html = f"<h3>Citations for {paper_title}</h3>"
-        url = f"http://recommendpapers.xyz/api/lookup_citations?id={pid}&offset=0&limit=3&fields=contexts,intents,citationCount,referenceCount,title,authors"
-        try:
-            resp = requests.get(url)
-            data = resp.json()
-            citations = data.get("citations", [])
-            if citations:
-                for citation in citations:
-                    citing = citation.get("citingPaper", {})
-                    citing_title = citing.get("title", "No Title")
-                    citing_authors = ", ".join([author.get("name", "Unknown") for author in citing.get("authors", [])])
-                    contexts = citation.get("contexts", [])
-                    context_text = "<br>".join([f"&nbsp;&nbsp;- {ctx}" for ctx in contexts]) if contexts else "&nbsp;&nbsp;- No context provided."
-                    citations_html += f"""
-                                        <div class="single-citation">
-                                            <span>* <strong>{citing_title}</strong></span><br>
-                                            <span>&nbsp;&nbsp;Authors: {citing_authors}</span><br>
-                                            <span>&nbsp;&nbsp;Contexts:</span><br>
-                                            <div class="citation-context">{context_text}</div>
-                                        </div>
-                                        """
-            else:
-                citations_html += "<p>No citations found.</p>"
-            all_citations_html += f"<div class='citation-block'>{citations_html}</div><div class='citation-divider'></div>"
-        except Exception as e:
-            all_citations_html += f"<p>Error retrieving citations for paper {pid}: {str(e)}</p><hr>"
-    
+
+    fragments = fan_out(
+        lambda pid: fetch_citations_fragment(pid, paper_title_map.get(pid, pid)),
+        paper_ids,
+        BATCH_MAX_WORKERS,
+    )
+    all_citations_html = "".join(fragments[pid] for pid in paper_ids)
     return format_citations_box(all_citations_html)
@@ -1,11 +1,6 @@
-from config import get_openai_api_key
-from openai import OpenAI
-import os
+from api.llm_cache import cached_chat_completion, stream_cached_chat_completion, accumulate_stream
 
-os.environ["OPENAI_API_KEY"] = get_openai_api_key()
-client = OpenAI()
-
-def compare_papers(paper_ids, paper_title_map):
+def build_comparison_prompt(paper_ids, paper_title_map):
     selected_ids = paper_ids  # Only compare first 3 papers
 
     paper_infos = []
@@ -36,16 +31,9 @@ def compare_papers(paper_ids, paper_title_map):
         f"### Papers to Compare:\n" + "\n".join(paper_infos) +
         "\n\nNow provide the structured markdown comparison below."
     )
+    return prompt
 
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        comparison = completion.choices[0].message.content
-    except Exception as e:
-        comparison = f"❌ Error generating comparison: {str(e)}"
-
+def format_comparison_html(comparison):
     html = f"""
     <div class="citation-box">
         <h2>Paper Comparison</h2>
@@ -53,3 +41,25 @@ def compare_papers(paper_ids, paper_title_map):
     </div>
     """
     return html
+
+def compare_papers(paper_ids, paper_title_map):
+    prompt = build_comparison_prompt(paper_ids, paper_title_map)
+
+    try:
+        comparison = cached_chat_completion([{"role": "user", "content": prompt}])
+    except Exception as e:
+        comparison = f"❌ Error generating comparison: {str(e)}"
+
+    return format_comparison_html(comparison)
+
+def stream_compare_papers(paper_ids, paper_title_map):
+    """Streams the comparison, yielding the HTML rendered so far as tokens arrive."""
+    prompt = build_comparison_prompt(paper_ids, paper_title_map)
+    comparison = ""
+
+    try:
+        for comparison in accumulate_stream(stream_cached_chat_completion([{"role": "user", "content": prompt}])):
+            yield format_comparison_html(comparison)
+    except Exception as e:
+        comparison += f"\n\n❌ Error generating comparison: {str(e)}"
+        yield format_comparison_html(comparison)
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def iter_fan_out(fn, keys, max_workers):
+    """
+    Calls fn(key) for every key on a bounded thread pool and yields
+    (key, result, error) tuples in completion order. Exactly one of
+    result/error is set for each key.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as executor:
+        futures = {executor.submit(fn, key): key for key in keys}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                yield key, None, e
+
+def fan_out(fn, keys, max_workers):
+    """
+    Calls fn(key) for every key concurrently and returns {key: result}.
+    Exceptions are re-raised from the first failing key.
+    """
+    results = {}
+    for key, result, error in iter_fan_out(fn, keys, max_workers):
+        if error is not None:
+            raise error
+        results[key] = result
+    return results
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from config import DEDUPE_ENABLED, DEDUPE_TITLE_THRESHOLD, DEDUPE_AUTHOR_THRESHOLD
+
+# MinHash signature length, split into LSH bands: titles agreeing on every row of any
+# band become candidates, which are then checked against the full signature
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 4
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_ARXIV_VERSION_RE = re.compile(r"v\d+$")
+
+def normalize_title(title):
+    """Lowercases, strips accents and punctuation, and collapses whitespace."""
+    text = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_ALNUM_RE.sub(" ", text.lower()).split())
+
+def author_surnames(authors):
+    return {normalize_title(name).split(" ")[-1] for name in authors or [] if normalize_title(name)}
+
+def external_id_keys(external_ids):
+    """Normalized "source:value" keys for the IDs that identify a work across records (DOI, ArXiv, ...)."""
+    keys = set()
+    for source, value in (external_ids or {}).items():
+        if value in (None, "", "Unknown"):
+            continue
+        value = str(value).strip().lower()
+        if source == "DOI":
+            value = value.removeprefix("https://doi.org/").removeprefix("doi:")
+        elif source == "ArXiv":
+            value = _ARXIV_VERSION_RE.sub("", value.removeprefix("arxiv:"))
+        keys.add(f"{source.lower()}:{value}")
+    return keys
+
+def minhash_signature(text):
+    """MinHash signature (NUM_PERM uint64 values) of the character shingles of a normalized string."""
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # All permutations at once: (a * x + b) mod p over a NUM_PERM x shingles matrix
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+def _merge_into(primary, duplicate):
+    """Folds a duplicate record into the primary one, keeping the primary's fields where both have them."""
+    primary["citations"] = max(primary.get("citations") or 0, duplicate.get("citations") or 0)
+    merged_ids = dict(duplicate.get("external_ids") or {})
+    merged_ids.update(primary.get("external_ids") or {})
+    primary["external_ids"] = merged_ids
+    if primary.get("pdf") in (None, "", "No PDF available") and duplicate.get("pdf"):
+        primary["pdf"] = duplicate["pdf"]
+    if not primary.get("authors") and duplicate.get("authors"):
+        primary["authors"] = duplicate["authors"]
+    primary.setdefault("duplicate_ids", []).append(str(duplicate.get("id")))
+
+class PaperDeduplicator:
+    """
+    Recognises papers that were already seen, incrementally, so it can sit in front of
+    result pages as they arrive.
+
+    A paper is a duplicate if it shares a normalized external ID (DOI, ArXiv, ...) with an
+    earlier paper, or if MinHash/LSH finds an earlier paper whose title is at least
+    `title_threshold` similar and whose author surnames overlap by `author_threshold`.
+    Duplicates are merged into the first record seen, so upstream ranking is kept.
+    """
+
+    def __init__(self, title_threshold=DEDUPE_TITLE_THRESHOLD, author_threshold=DEDUPE_AUTHOR_THRESHOLD):
+        self.title_threshold = title_threshold
+        self.author_threshold = author_threshold
+        self.records = {}           # canonical paper id -> merged record
+        self.aliases = {}           # duplicate paper id -> canonical paper id
+        self._by_external_id = {}
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+        self._authors = {}
+
+    def _same_authors(self, a, b):
+        if not a or not b:
+            return True
+        return len(a & b) / len(a | b) >= self.author_threshold
+
+    def _find_similar(self, signature, authors):
+        candidates = set()
+        for band in range(LSH_BANDS):
+            band_key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            candidates.update(self._buckets.get(band_key, ()))
+        for pid in candidates:
+            similarity = float(np.mean(self._signatures[pid] == signature))
+            if similarity >= self.title_threshold and self._same_authors(self._authors[pid], authors):
+                return pid
+        return None
+
+    def add(self, paper):
+        """
+        Registers a paper dict and returns (canonical_id, is_duplicate). New papers are
+        stored as a copy; duplicates are merged into the record of their canonical paper.
+        """
+        pid = str(paper.get("id"))
+        if pid in self.records:
+            return pid, True
+        if pid in self.aliases:
+            return self.aliases[pid], True
+
+        id_keys = external_id_keys(paper.get("external_ids"))
+        title = normalize_title(paper.get("title"))
+        authors = author_surnames(paper.get("authors"))
+        signature = minhash_signature(title) if title else None
+
+        canonical = next((self._by_external_id[k] for k in id_keys if k in self._by_external_id), None)
+        if canonical is None and signature is not None:
+            canonical = self._find_similar(signature, authors)
+
+        if canonical is not None:
+            self.aliases[pid] = canonical
+            _merge_into(self.records[canonical], paper)
+            for key in id_keys:
+                self._by_external_id.setdefault(key, canonical)
+            return canonical, True
+
+        self.records[pid] = dict(paper)
+        for key in id_keys:
+            self._by_external_id.setdefault(key, pid)
+        if signature is not None:
+            self._signatures[pid] = signature
+            self._authors[pid] = authors
+            for band in range(LSH_BANDS):
+                self._buckets[(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())].append(pid)
+        return pid, False
+
+def dedupe_papers(papers):
+    """
+    Returns the papers with duplicates merged away, in order of first appearance.
+    With DEDUPE_ENABLED off, only papers repeating the same ID are dropped.
+    """
+    if not DEDUPE_ENABLED:
+        unique = {}
+        for paper in papers:
+            if isinstance(paper, dict):
+                unique.setdefault(str(paper.get("id")), paper)
+        return list(unique.values())
+    deduper = PaperDeduplicator()
+    for paper in papers:
+        if isinstance(paper, dict):
+            deduper.add(paper)
+    return list(deduper.records.values())
@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class DiskCache:
+    """
+    A small persistent key-value cache backed by SQLite.
+
+    Values are stored as JSON. Entries older than `ttl` seconds are considered stale,
+    and are still served for another `stale_ttl` seconds so callers can revalidate them
+    in the background. Once the cache holds more than `max_entries` rows, the least
+    recently used ones are evicted.
+    """
+
+    def __init__(self, path, ttl=None, stale_ttl=0, max_entries=1000):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get_entry(self, key):
+        """
+        Returns (value, is_stale) for a usable entry, or None on a miss.
+        Entries past both the TTL and the stale window are deleted and count as a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            age = now - created_at
+            if self.ttl is not None and age > self.ttl + self.stale_ttl:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        is_stale = self.ttl is not None and age > self.ttl
+        return json.loads(value), is_stale
+
+    def get(self, key, default=None):
+        """Returns the cached value if it is still fresh, else `default`."""
+        entry = self.get_entry(key)
+        if entry is None or entry[1]:
+            return default
+        return entry[0]
+
+    def set(self, key, value):
+        """Stores a JSON-serialisable value and evicts the least recently used entries if needed."""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
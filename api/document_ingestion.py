@@ -0,0 +1,224 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF for PDFs
+import docx
+
+from api.disk_cache import DiskCache
+from config import CACHE_DIR, INGEST_MAX_PAGES, INGEST_MAX_BYTES, INGEST_MAX_CHARS, PDF_EXTRACT_WORKERS, PDF_PARALLEL_MIN_PAGES
+
+# Bump whenever the extraction logic changes so cached results are not reused
+INGEST_VERSION = "v1"
+
+SUPPORTED_EXTENSIONS = (".txt", ".docx", ".pdf")
+
+ABSTRACT_MAX_CHARS = 1500
+MAX_HEADINGS = 25
+
+_ABSTRACT_RE = re.compile(r"^\s*abstract\b[\s.:—-]*", re.IGNORECASE)
+_NUMBERED_HEADING_RE = re.compile(r"^(\d+(\.\d+)*\.?|[IVX]+\.)\s+[A-Z][^.!?]{1,80}$")
+_NAMED_HEADING_RE = re.compile(
+    r"^(introduction|related work|background|preliminaries|method|methods|methodology|approach|"
+    r"experiments?|evaluation|results|discussion|conclusions?|future work|limitations)$",
+    re.IGNORECASE,
+)
+_REFERENCES_RE = re.compile(r"^(\d+\.?\s+)?(references|bibliography)$", re.IGNORECASE)
+_NOISE_RE = re.compile(r"^(arxiv:\S+|[\d\W]+)$", re.IGNORECASE)
+
+class UnsupportedFormatError(ValueError):
+    """Raised for uploads that are not .txt, .docx or .pdf files."""
+
+_document_cache = DiskCache(os.path.join(CACHE_DIR, "documents.sqlite3"), max_entries=2000)
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _hash_file(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _iter_txt_blocks(file_path, max_bytes, chunk_size=64 * 1024):
+    """Yields the lines of a text file, reading it in chunks and never more than about max_bytes."""
+    remaining = max_bytes
+    pending = ""
+    with open(file_path, "r", encoding="utf-8") as f:
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk.encode("utf-8"))
+            lines = (pending + chunk).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line + "\n", False
+    if pending:
+        yield pending, False
+
+def _iter_docx_blocks(file_path):
+    doc = docx.Document(file_path)
+    for para in doc.paragraphs:
+        style_name = para.style.name if para.style is not None else ""
+        yield para.text, style_name.startswith(("Heading", "Title"))
+
+def _get_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                # Spawn rather than fork: the Gradio process is multi-threaded
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=PDF_EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pdf_pool
+
+def _extract_page_range(file_path, start, stop):
+    """Runs in a worker process: opens the PDF independently and returns the text of pages [start, stop)."""
+    with fitz.open(file_path) as pdf_document:
+        return [pdf_document.load_page(page_number).get_text() for page_number in range(start, stop)]
+
+def _page_ranges(page_count, workers):
+    # A few ranges per worker keeps them busy when some pages are much heavier than others
+    chunk_size = max(1, -(-page_count // (workers * 2)))
+    return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+def iter_pdf_pages(file_path, max_pages=INGEST_MAX_PAGES, workers=PDF_EXTRACT_WORKERS):
+    """
+    Yields the text of each PDF page in page order, up to max_pages, reading pages lazily.
+
+    Only when INGEST_MAX_PAGES is raised so that PDF_PARALLEL_MIN_PAGES or more pages are read
+    are the pages split into ranges and extracted in parallel on a spawn process pool. Below
+    that, starting worker processes costs more than it saves.
+    """
+    with fitz.open(file_path) as pdf_document:
+        page_count = min(pdf_document.page_count, max_pages)
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            for page_number in range(page_count):
+                yield pdf_document.load_page(page_number).get_text()
+            return
+
+    futures = [_get_pdf_pool().submit(_extract_page_range, file_path, start, stop) for start, stop in _page_ranges(page_count, workers)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Stop outstanding ranges if the caller stops reading early (e.g. byte cap reached)
+        for future in futures:
+            future.cancel()
+
+def _iter_pdf_blocks(file_path, max_pages):
+    for page_text in iter_pdf_pages(file_path, max_pages):
+        for line in page_text.splitlines():
+            yield line, False
+
+def iter_document_blocks(file_path, max_pages=INGEST_MAX_PAGES, max_bytes=INGEST_MAX_BYTES):
+    """
+    Lazily yields (text, is_heading) blocks from a .txt, .docx or .pdf file,
+    stopping once max_pages (PDF only) or max_bytes of text have been read.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == ".txt":
+        blocks = _iter_txt_blocks(file_path, max_bytes)
+    elif file_extension == ".docx":
+        blocks = _iter_docx_blocks(file_path)
+    elif file_extension == ".pdf":
+        blocks = _iter_pdf_blocks(file_path, max_pages)
+    else:
+        raise UnsupportedFormatError(f"Unsupported file format: {file_extension}")
+
+    read_bytes = 0
+    for text, is_heading in blocks:
+        read_bytes += len(text.encode("utf-8"))
+        if read_bytes > max_bytes:
+            break
+        yield text, is_heading
+
+def extract_salient_text(blocks, max_chars=INGEST_MAX_CHARS):
+    """
+    Picks out the title, abstract and section headings from a stream of blocks.
+    Falls back to the leading text when the document has no recognisable structure.
+    Reading stops at the references section.
+    """
+    title = None
+    abstract_lines = []
+    abstract_chars = 0
+    in_abstract = False
+    headings = []
+    preview = []
+    preview_chars = 0
+
+    for text, is_heading in blocks:
+        line = " ".join(text.split())
+        if not line:
+            continue
+
+        if preview_chars < max_chars:
+            preview.append(line)
+            preview_chars += len(line) + 1
+
+        if _REFERENCES_RE.match(line):
+            break
+
+        if title is None:
+            if is_heading or (len(line) <= 200 and not _NOISE_RE.match(line)):
+                title = line
+            continue
+
+        if _ABSTRACT_RE.match(line):
+            in_abstract = True
+            rest = _ABSTRACT_RE.sub("", line, count=1).strip()
+            if rest:
+                abstract_lines.append(rest)
+                abstract_chars += len(rest)
+            continue
+
+        if is_heading or _NUMBERED_HEADING_RE.match(line) or _NAMED_HEADING_RE.match(line):
+            in_abstract = False
+            if len(headings) < MAX_HEADINGS:
+                headings.append(line)
+            continue
+
+        if in_abstract and abstract_chars < ABSTRACT_MAX_CHARS:
+            abstract_lines.append(line)
+            abstract_chars += len(line)
+
+    if not abstract_lines and not headings:
+        return " ".join(preview)[:max_chars]
+
+    parts = []
+    if title:
+        parts.append(f"Title: {title}")
+    if abstract_lines:
+        parts.append(f"Abstract: {' '.join(abstract_lines)[:ABSTRACT_MAX_CHARS]}")
+    if headings:
+        parts.append(f"Sections: {'; '.join(headings)}")
+    return "\n".join(parts)[:max_chars]
+
+def ingest_document(file_path, max_pages=INGEST_MAX_PAGES, max_bytes=INGEST_MAX_BYTES, max_chars=INGEST_MAX_CHARS):
+    """
+    Extracts the salient text (title, abstract, headings) of an uploaded document.
+    Pages are read lazily within the page/byte caps, and results are cached by the
+    file's content hash, so re-uploading the same file skips extraction entirely.
+
+    :return: The extracted text.
+    :raises UnsupportedFormatError: If the file format is not supported.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise UnsupportedFormatError(f"Unsupported file format: {file_extension}")
+
+    cache_key = f"{INGEST_VERSION}:{file_extension}:{_hash_file(file_path)}:{max_pages}:{max_bytes}:{max_chars}"
+    text = _document_cache.get(cache_key)
+    if text is not None:
+        return text
+
+    text = extract_salient_text(iter_document_blocks(file_path, max_pages, max_bytes), max_chars)
+    _document_cache.set(cache_key, text)
+    return text
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    UPSTREAM_BASE_URL,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_BACKOFF_FACTOR,
+    UPSTREAM_POOL_SIZE,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+_latency_stats = {}   # endpoint → {"count", "errors", "total_seconds", "max_seconds"}
+_stats_lock = threading.Lock()
+
+def get_session():
+    """
+    Returns the shared requests.Session used for every upstream call.
+    Connections are pooled and kept alive, and idempotent requests are retried with backoff.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=UPSTREAM_MAX_RETRIES,
+                    backoff_factor=UPSTREAM_BACKOFF_FACTOR,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=UPSTREAM_POOL_SIZE,
+                    pool_maxsize=UPSTREAM_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def _record_latency(endpoint, elapsed, failed):
+    with _stats_lock:
+        stats = _latency_stats.setdefault(
+            endpoint, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        stats["count"] += 1
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        if failed:
+            stats["errors"] += 1
+
+def upstream_get(endpoint, params=None, timeout=None):
+    """
+    Sends a GET request to an upstream endpoint (e.g. "paper_search", "bibtex")
+    through the shared session and records its latency.
+
+    :param endpoint: Endpoint name relative to UPSTREAM_BASE_URL.
+    :param params: Optional dict of query parameters.
+    :param timeout: Optional (connect, read) timeout tuple overriding the configured defaults.
+    :return: The requests.Response object.
+    """
+    url = f"{UPSTREAM_BASE_URL}/{endpoint}"
+    timeout = timeout or (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT)
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = get_session().get(url, params=params, timeout=timeout)
+        failed = response.status_code >= 400
+        return response
+    finally:
+        _record_latency(endpoint, time.perf_counter() - start, failed)
+
+def get_latency_stats():
+    """Returns a snapshot of per-endpoint latency counters, including the mean latency."""
+    with _stats_lock:
+        snapshot = {}
+        for endpoint, stats in _latency_stats.items():
+            entry = dict(stats)
+            entry["mean_seconds"] = stats["total_seconds"] / stats["count"] if stats["count"] else 0.0
+            snapshot[endpoint] = entry
+        return snapshot
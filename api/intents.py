@@ -0,0 +1,74 @@
+from api.paper_search import search_papers, search_papers_async, collect_search_results
+from api.rerank import rerank_papers
+from api.dedupe import dedupe_papers
+from config import RERANK_ENABLED, RERANK_CANDIDATES, SEARCH_PAGE_SIZE, SEARCH_MAX_RESULTS
+
+def format_papers_markdown(papers, start=1):
+    """Formats papers as a numbered Markdown list, numbering from `start`."""
+    text = ""
+    for i, paper in enumerate(papers, start):
+        text += (
+            f"**{i}. {paper['title']}**\n"
+            f"🔗 {'[PDF Available]('+paper['pdf']+')' if paper['pdf'] != 'No PDF available' else 'No PDF available'}\n"
+            f"👥 Authors: {', '.join(paper['authors'])}\n"
+            f"📊 Citations: {paper['citations']}\n\n"
+        )
+    return text
+
+def format_search_response(papers, offset=0):
+    """Builds the chatbot response (Markdown text plus the raw papers) for a search."""
+    if not papers or ("error" in papers):
+        response_text = "❌ Sorry, I couldn't find any papers on that topic."
+    elif offset:
+        response_text = format_papers_markdown(papers, offset + 1)
+    else:
+        response_text = "**Here are some relevant research papers:**\n\n" + format_papers_markdown(papers)
+    return {"response": response_text, "papers": papers}
+
+def _rerank_query(user_message, query_text):
+    return f"{query_text} {user_message}" if query_text else user_message
+
+def _uses_rerank_window(offset):
+    return RERANK_ENABLED and offset < RERANK_CANDIDATES
+
+def _rerank_page(candidates, user_message, query_text, offset):
+    """Dedupes and re-ranks the candidate window, then cuts out the page at `offset`."""
+    if not isinstance(candidates, list):
+        return candidates  # Error dict from the search
+    ranked = rerank_papers(_rerank_query(user_message, query_text), dedupe_papers(candidates))
+    return ranked[offset:offset + SEARCH_PAGE_SIZE]
+
+def handle_intents(user_message, offset=0, query_text=None):
+    """
+    Searches for the keyword in user_message and formats the page of results at `offset`.
+    Pages inside the re-ranking window are cut from the top RERANK_CANDIDATES results (fetched
+    in one request), re-ranked against the user's original query_text (falling back to the keyword).
+    """
+    print("Received query:", user_message)
+    if _uses_rerank_window(offset):
+        candidates = search_papers(user_message, limit=RERANK_CANDIDATES)
+        papers = _rerank_page(candidates, user_message, query_text, offset)
+    else:
+        papers = search_papers(user_message, offset=offset)
+    print("Papers returned:", papers)
+    return format_search_response(papers, offset)
+
+async def handle_intents_async(user_message, offset=0, query_text=None):
+    print("Received query:", user_message)
+    if _uses_rerank_window(offset):
+        candidates = await search_papers_async(user_message, limit=RERANK_CANDIDATES)
+        papers = _rerank_page(candidates, user_message, query_text, offset)
+    else:
+        papers = await search_papers_async(user_message, offset=offset)
+    print("Papers returned:", papers)
+    return format_search_response(papers, offset)
+
+def handle_top_cited(user_message, top_k, max_results=SEARCH_MAX_RESULTS):
+    """
+    Scans up to max_results papers for the keyword in user_message (in bulk pages, several at
+    once) and formats the top_k most cited of them.
+    """
+    print("Received top-cited query:", user_message, "top_k:", top_k)
+    papers = collect_search_results(user_message, max_results=max_results, top_k_by_citations=top_k)
+    print("Papers returned:", len(papers))
+    return format_search_response(papers)
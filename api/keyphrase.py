@@ -0,0 +1,174 @@
+import re
+from collections import defaultdict
+
+# Abbreviations expanded before searching (the GPT prompt asks for the same)
+ABBREVIATIONS = {
+    "AI": "artificial intelligence",
+    "ML": "machine learning",
+    "DL": "deep learning",
+    "RL": "reinforcement learning",
+    "NLP": "natural language processing",
+    "NLU": "natural language understanding",
+    "NLG": "natural language generation",
+    "LLM": "large language models",
+    "CV": "computer vision",
+    "CNN": "convolutional neural networks",
+    "RNN": "recurrent neural networks",
+    "GNN": "graph neural networks",
+    "GAN": "generative adversarial networks",
+    "VAE": "variational autoencoders",
+    "LSTM": "long short-term memory",
+    "NER": "named entity recognition",
+    "QA": "question answering",
+    "ASR": "automatic speech recognition",
+    "TTS": "text to speech",
+    "OCR": "optical character recognition",
+    "IR": "information retrieval",
+    "RAG": "retrieval augmented generation",
+    "XAI": "explainable artificial intelligence",
+    "HCI": "human computer interaction",
+    "IOT": "internet of things",
+    "AR": "augmented reality",
+    "VR": "virtual reality",
+    "SLAM": "simultaneous localization and mapping",
+    "MRI": "magnetic resonance imaging",
+    "EHR": "electronic health records",
+}
+# Short abbreviations that are also common words are only expanded when written in capitals
+_CAPS_ONLY_ABBREVIATIONS = {"AR", "IR", "CV", "QA", "DL", "RL", "VR"}
+
+STOPWORDS = set("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers him his how i if in into is it its itself just me more most my myself nor of off on once
+only or other our ours out over own same she should so some such than that the their theirs them then there
+these they this those through to too under until up very was we were what when where which while who whom
+why will with would you your yours etc via using use used based towards toward within across among new
+""".split())
+
+# Words that describe the search itself rather than its topic
+DOMAIN_STOPWORDS = set("""
+find search show give get list want need needs looking look interested research researching paper papers
+article articles study studies publication publications literature related regarding recent latest topic topics
+work works please help some good best top survey surveys overview review reviews learn know explore
+title abstract sections
+""".split())
+
+ALL_STOPWORDS = STOPWORDS | DOMAIN_STOPWORDS
+
+SHORT_QUERY_MAX_WORDS = 12
+MAX_PHRASE_WORDS = 8
+NEGATION_CHECK_WORDS = 30
+
+_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#'\-]*|\d+|[.,;:!?()\[\]{}\"\n]")
+_NEGATION_RE = re.compile(r"\b(not|no|don'?t|do not|without|except|excluding|exclude|avoid|other than)\b", re.IGNORECASE)
+
+def expand_abbreviation(token):
+    """Returns the expansion of an abbreviation such as "NLP" or "LLMs", or None."""
+    base = token[:-1] if token.endswith("s") and token[:-1].upper() in ABBREVIATIONS else token
+    key = base.upper()
+    if key not in ABBREVIATIONS:
+        return None
+    if key in _CAPS_ONLY_ABBREVIATIONS and not base.isupper():
+        return None
+    return ABBREVIATIONS[key]
+
+def _tokens(text):
+    return _TOKEN_RE.findall(text)
+
+def _candidate_phrases(text):
+    """Splits text into RAKE candidate phrases at stopwords and punctuation."""
+    phrases = []
+    current = []
+    for token in _tokens(text):
+        expansion = expand_abbreviation(token)
+        if expansion:
+            current.extend(expansion.split())
+            continue
+        word = token.lower()
+        if not word[0].isalpha() or word in ALL_STOPWORDS:
+            if current:
+                phrases.append(current)
+                current = []
+            continue
+        current.append(word)
+    if current:
+        phrases.append(current)
+    return phrases
+
+def rake_keyphrases(text):
+    """
+    Ranks candidate phrases with RAKE (word degree / frequency, summed per phrase).
+    Returns a list of (phrase, score), best first.
+    """
+    phrases = _candidate_phrases(text)
+    frequency = defaultdict(int)
+    degree = defaultdict(int)
+    for words in phrases:
+        for word in words:
+            frequency[word] += 1
+            degree[word] += len(words)
+
+    scores = {}
+    for words in phrases:
+        phrase = " ".join(words)
+        scores[phrase] = sum(degree[w] / frequency[w] for w in words)
+
+    # Phrases that recur across the text are more likely to be the topic
+    counts = defaultdict(int)
+    for words in phrases:
+        counts[" ".join(words)] += 1
+    return sorted(((p, s * counts[p]) for p, s in scores.items()), key=lambda item: item[1], reverse=True)
+
+def _short_query_phrase(text):
+    words = []
+    for phrase in _candidate_phrases(text):
+        for word in phrase:
+            if word not in words:
+                words.append(word)
+    return " ".join(words)
+
+def _document_phrase(ranked):
+    words = []
+    for phrase, _ in ranked:
+        for word in phrase.split():
+            if word not in words:
+                words.append(word)
+        if len(words) >= 5:
+            break
+    return " ".join(words[:MAX_PHRASE_WORDS])
+
+def extract_local_keyphrase(text):
+    """
+    Extracts a search phrase without any network call.
+
+    Short queries keep their content words in order. Longer text (e.g. uploaded documents)
+    is ranked with RAKE and the top phrases are combined into a 5–8 word phrase.
+
+    :return: (phrase, confident). When confident is False the caller should escalate to GPT.
+    """
+    if not text or not text.strip():
+        return "", False
+
+    # Exclusions ("but not NLP") need real language understanding. Only the leading words
+    # are checked, since that is where the user's own query sits ahead of any uploaded text.
+    words = text.split()
+    if _NEGATION_RE.search(" ".join(words[:NEGATION_CHECK_WORDS])):
+        return "", False
+
+    word_count = len(words)
+    if word_count <= SHORT_QUERY_MAX_WORDS:
+        phrase = _short_query_phrase(text)
+        n_words = len(phrase.split())
+        return phrase, 2 <= n_words <= MAX_PHRASE_WORDS
+
+    ranked = rake_keyphrases(text)
+    if not ranked:
+        return "", False
+
+    phrase = _document_phrase(ranked)
+    scores = sorted(score for _, score in ranked)
+    median = scores[len(scores) // 2]
+    # Confident when the top phrase stands clearly above the typical candidate
+    confident = len(phrase.split()) >= 3 and len(ranked[0][0].split()) >= 2 and ranked[0][1] >= 2 * median
+    return phrase, confident
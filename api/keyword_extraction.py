@@ -1,20 +1,19 @@
-import os
-from config import get_openai_api_key
-
-# Set OpenAI API key as an environment variable
-os.environ["OPENAI_API_KEY"] = get_openai_api_key()
-
-import openai
-from openai import OpenAI
-
-# Initialize the OpenAI client
-client = OpenAI()
+from config import LOCAL_KEYPHRASE_ENABLED
+from api.llm_cache import cached_chat_completion
+from api.keyphrase import extract_local_keyphrase
 
 def extract_main_keyword(text):
     """
-    Extracts the main topic keyword from the given text using OpenAI's GPT-4 API.
-    Returns only one keyword (e.g., "Deep Learning", "Natural Language Processing").
+    Extracts the main topic keyword from the given text.
+    A local keyphrase extractor is tried first; OpenAI's GPT-4 API is only used when
+    the local result is not confident (e.g. exclusions, single-word or unstructured text).
+    Returns a single search phrase (e.g., "robotic surgery computer vision systems").
     """
+    if LOCAL_KEYPHRASE_ENABLED:
+        phrase, confident = extract_local_keyphrase(text)
+        if confident:
+            return phrase
+
     prompt = (
         "You are an expert at understanding academic search queries and generating powerful multi-keyword research phrases.\n\n"
         "Given a user’s text, extract a **5–6 word search phrase** containing the most important and relevant keywords. "
@@ -36,11 +35,7 @@ def extract_main_keyword(text):
     )
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        keyword = completion.choices[0].message.content.strip()
+        keyword = cached_chat_completion([{"role": "user", "content": prompt}]).strip()
     except Exception as e:
         keyword = f"Error extracting keyword: {str(e)}"
     
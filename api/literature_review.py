@@ -1,48 +1,138 @@
-import requests
+import html
 
-def get_bibtex_reference(paper_id, paper_metadata):
-    """
-    Fetches the BibTeX reference for a given paper ID. If BibTeX is not found,
-    constructs a reference using available metadata.
-    """
-    lookup_bibtex_url = "http://recommendpapers.xyz/api/bibtex"
-    response = requests.get(f"{lookup_bibtex_url}?id=CorpusId:{paper_id}")
+from api.bibtex import fetch_bibtex_text
+from api.concurrency import fan_out
+from api.keyphrase import rake_keyphrases
+from api.llm_cache import cached_chat_completion
+from api.rerank import similarity_scores
+from config import REVIEW_MAX_THEMES, REVIEW_MAX_WORKERS, REVIEW_THEME_SIMILARITY
 
-    if response.status_code == 200:
-        data = response.json()
-        papers = data.get("papers", [])
-
-        # Check if "papers" exists and is not empty before accessing index 0
-        if papers and isinstance(papers, list) and len(papers) > 0:
-            if "bibtex" in papers[0]:  # Ensure BibTeX key exists
-                return papers[0]["bibtex"]
-
-    # If BibTeX is not found, construct a citation from metadata
+def _metadata_reference(paper_id, paper_metadata):
+    """Constructs a plain-text reference from metadata when no BibTeX entry is available."""
     metadata = paper_metadata.get(paper_id, {})
     title = metadata.get("title", "Unknown Title")
     authors = metadata.get("authors", "Unknown Authors")
+    if isinstance(authors, list):
+        authors = ", ".join(authors) or "Unknown Authors"
     journal = metadata.get("journal", "Unknown Journal")
     year = metadata.get("year", "Unknown Year")
 
     return f"{authors} ({year}). {title}. {journal}."
 
-def generate_literature_review(paper_ids, paper_metadata):
+def get_bibtex_reference(paper_id, paper_metadata):
+    """
+    Fetches the BibTeX reference for a given paper ID through the shared BibTeX lookup
+    (api.bibtex.fetch_bibtex_text), so entries fetched during search are reused from its cache.
+    If BibTeX is not found, constructs a reference using available metadata.
+    """
+    papers = [dict(metadata, id=pid) for pid, metadata in paper_metadata.items()]
+    bibtex_text = fetch_bibtex_text(paper_id, papers, use_gpt_fallback=False)
+    if bibtex_text and bibtex_text.lstrip().startswith("@"):
+        return bibtex_text
+    return _metadata_reference(paper_id, paper_metadata)
+
+def group_into_themes(paper_ids, paper_metadata, max_themes=REVIEW_MAX_THEMES, threshold=REVIEW_THEME_SIMILARITY):
     """
-    Generates a structured Literature Review using BibTeX references.
-    If BibTeX is unavailable, metadata is used instead.
+    Groups papers into themes by title similarity: the most cited ungrouped paper seeds a theme
+    and collects every ungrouped paper similar enough to it. Papers left over once max_themes
+    themes exist are grouped together. Returns a list of (theme name, [paper ids]).
+    """
+    remaining = sorted(paper_ids, key=lambda pid: paper_metadata.get(pid, {}).get("citations") or 0, reverse=True)
+    groups = []
+    while remaining and len(groups) < max_themes - 1:
+        seed, candidates = remaining[0], remaining[1:]
+        papers = [{"id": pid, "title": paper_metadata.get(pid, {}).get("title", "")} for pid in candidates]
+        scores = similarity_scores(paper_metadata.get(seed, {}).get("title", ""), papers)
+        members = [seed] + [pid for pid, score in zip(candidates, scores) if score >= threshold]
+        groups.append(members)
+        remaining = [pid for pid in candidates if pid not in members]
+    if remaining:
+        groups.append(remaining)
+
+    themes = []
+    for members in groups:
+        titles = ". ".join(paper_metadata.get(pid, {}).get("title", "") for pid in members)
+        ranked = rake_keyphrases(titles)
+        name = ranked[0][0].title() if ranked else "Related Work"
+        themes.append((name, members))
+    return themes
+
+def build_theme_prompt(theme_name, members, paper_metadata, reference_numbers):
+    paper_lines = []
+    for pid in members:
+        metadata = paper_metadata.get(pid, {})
+        authors = ", ".join(metadata.get("authors", [])[:3]) or "Unknown Authors"
+        paper_lines.append(
+            f"[{reference_numbers[pid]}] {metadata.get('title', 'Unknown Title')} — {authors} "
+            f"({metadata.get('citations', 0)} citations)"
+        )
+
+    return (
+        "You are writing one section of an academic literature review.\n\n"
+        f"Section theme: {theme_name}\n\n"
+        "Papers in this section:\n" + "\n".join(paper_lines) + "\n\n"
+        "Write 1-3 paragraphs that synthesise these papers: what problem they address, how their "
+        "approaches relate or differ, and what open questions remain. Cite papers only by their bracketed "
+        "number, e.g. [2]. Base your discussion on the titles and do not invent specific results. "
+        "Return plain text paragraphs separated by blank lines, without headings."
+    )
+
+def write_theme_section(theme_name, members, paper_metadata, reference_numbers):
+    """Generates the narrative for one theme; falls back to listing its papers if generation fails."""
+    try:
+        prompt = build_theme_prompt(theme_name, members, paper_metadata, reference_numbers)
+        narrative = cached_chat_completion([{"role": "user", "content": prompt}])
+        paragraphs = [p.strip() for p in narrative.split("\n\n") if p.strip()]
+        return "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs)
+    except Exception as e:
+        print(f"[REVIEW] Section '{theme_name}' failed: {e}")
+        items = "".join(
+            f"<li>[{reference_numbers[pid]}] {html.escape(paper_metadata.get(pid, {}).get('title', 'Unknown Title'))}</li>"
+            for pid in members
+        )
+        return f"<ul>{items}</ul>"
+
+def generate_literature_review(paper_ids, paper_metadata, max_workers=REVIEW_MAX_WORKERS):
+    """
+    Generates a structured Literature Review: narrative sections per theme, followed by
+    the numbered references as BibTeX. If BibTeX is unavailable, metadata is used instead.
+
+    All reference lookups and all section generations run concurrently on one bounded pool,
+    so the review takes about as long as its slowest lookup or section.
+
+    :param paper_ids: Paper IDs to review, in the order their references are numbered.
+    :param paper_metadata: Dict mapping paper_id to a paper dict (title, authors, citations, external_ids, ...).
     """
     if not paper_ids:
         return "<div>No papers available for Literature Review.</div>"
-    
-    review_content = "<h2>Literature Review</h2><p>Below is the list of references for the papers found in your search results:</p>"
-    for pid in paper_ids:
-        bibtex_or_metadata = get_bibtex_reference(pid, paper_metadata)
-        review_content += f"<h3>{paper_metadata.get(pid, {}).get('title', 'Unknown Title')}</h3><pre>{bibtex_or_metadata}</pre><hr>"
+
+    paper_ids = list(dict.fromkeys(paper_ids))
+    reference_numbers = {pid: i for i, pid in enumerate(paper_ids, start=1)}
+    themes = group_into_themes(paper_ids, paper_metadata)
+
+    def run(task):
+        kind, index = task
+        if kind == "reference":
+            return get_bibtex_reference(paper_ids[index], paper_metadata)
+        name, members = themes[index]
+        return write_theme_section(name, members, paper_metadata, reference_numbers)
+
+    tasks = [("section", i) for i in range(len(themes))] + [("reference", i) for i in range(len(paper_ids))]
+    results = fan_out(run, tasks, max_workers)
+
+    review_content = "<h2>Literature Review</h2>"
+    for i, (name, _) in enumerate(themes):
+        review_content += f"<h3>{html.escape(name)}</h3>{results[('section', i)]}"
+
+    review_content += "<h2>References</h2>"
+    for i, pid in enumerate(paper_ids):
+        title = paper_metadata.get(pid, {}).get("title", "Unknown Title")
+        review_content += f"<h3>[{i + 1}] {html.escape(title)}</h3><pre>{results[('reference', i)]}</pre><hr>"
 
     # Wrap everything in a scrollable HTML box
-    html = f"""
+    html_box = f"""
     <div style="border: 2px solid #333; padding: 10px; height: 90vh; overflow-y: auto;">
         {review_content}
     </div>
     """
-    return html
\ No newline at end of file
+    return html_box
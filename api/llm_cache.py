@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.disk_cache import DiskCache
+from api.openai_pool import get_openai_pool
+from api.singleflight import SingleFlight
+from config import CACHE_DIR, LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_DISK_ENTRIES, LLM_CACHE_TTL
+
+class LRUCache:
+    """A thread-safe in-memory LRU cache holding at most `max_entries` items."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+_memory_cache = LRUCache(LLM_CACHE_MEMORY_ENTRIES)
+_disk_cache = DiskCache(
+    os.path.join(CACHE_DIR, "llm_completions.sqlite3"),
+    ttl=LLM_CACHE_TTL,
+    max_entries=LLM_CACHE_DISK_ENTRIES,
+)
+
+# Identical prompts requested at the same time share one API call
+_completion_flight = SingleFlight()
+
+_metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+_metrics_lock = threading.Lock()
+
+def _count(metric):
+    with _metrics_lock:
+        _metrics[metric] += 1
+
+def completion_cache_key(model, messages):
+    """Returns a content hash of the model name and the full message list."""
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_cached_completion(model, messages):
+    """Looks up a completion in memory, then on disk. Returns None on a miss."""
+    key = completion_cache_key(model, messages)
+    content = _memory_cache.get(key)
+    if content is not None:
+        _count("memory_hits")
+        return content
+
+    content = _disk_cache.get(key)
+    if content is not None:
+        _count("disk_hits")
+        _memory_cache.set(key, content)
+        return content
+
+    _count("misses")
+    return None
+
+def store_completion(model, messages, content):
+    """Stores a completion in both cache tiers."""
+    key = completion_cache_key(model, messages)
+    _memory_cache.set(key, content)
+    _disk_cache.set(key, content)
+
+def cached_chat_completion(messages, model="gpt-4o"):
+    """
+    Returns the message content of a chat completion, serving identical
+    (model, messages) requests from the cache and coalescing identical in-flight
+    requests into one API call. Errors are raised, never cached.
+
+    :param messages: List of chat messages, as passed to chat.completions.create.
+    :param model: Model name.
+    :return: The completion text.
+    """
+    content = get_cached_completion(model, messages)
+    if content is not None:
+        return content
+
+    return _completion_flight.do(completion_cache_key(model, messages), _complete_and_store, messages, model)
+
+def _complete_and_store(messages, model):
+    completion = get_openai_pool().chat_completion(messages, model=model)
+    content = completion.choices[0].message.content
+    if content is not None:
+        store_completion(model, messages, content)
+    return content
+
+def stream_cached_chat_completion(messages, model="gpt-4o"):
+    """
+    Streams a chat completion, yielding text chunks as they arrive.
+    A cached completion is yielded as a single chunk. The full text is cached
+    only once the stream has been consumed to the end.
+    """
+    content = get_cached_completion(model, messages)
+    if content is not None:
+        yield content
+        return
+
+    stream = get_openai_pool().chat_completion(messages, model=model, stream=True)
+    parts = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    content = "".join(parts)
+    if content:
+        store_completion(model, messages, content)
+
+def accumulate_stream(chunks, min_interval=0.1):
+    """
+    Joins streamed text chunks and yields the text received so far, at most
+    once every `min_interval` seconds, always ending with the complete text.
+    """
+    text = ""
+    last_yield = 0.0
+    pending = False
+    for chunk in chunks:
+        text += chunk
+        pending = True
+        now = time.monotonic()
+        if now - last_yield >= min_interval:
+            last_yield = now
+            pending = False
+            yield text
+    if pending:
+        yield text
+
+def get_cache_metrics():
+    """Returns hit/miss counters and the current size of the in-memory tier."""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    lookups = metrics["memory_hits"] + metrics["disk_hits"] + metrics["misses"]
+    metrics["hit_rate"] = (metrics["memory_hits"] + metrics["disk_hits"]) / lookups if lookups else 0.0
+    metrics["memory_entries"] = len(_memory_cache)
+    return metrics
@@ -0,0 +1,163 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import openai
+from openai import OpenAI
+
+from config import OPENAI_API_KEYS, OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, OPENAI_MAX_RETRIES
+
+WINDOW_SECONDS = 60.0
+DEFAULT_COMPLETION_TOKENS = 1000
+MAX_BACKOFF_SECONDS = 30.0
+
+class _KeyState:
+    """Client and rolling one-minute usage for one API key."""
+
+    def __init__(self, key):
+        self.client = OpenAI(api_key=key, max_retries=0)  # Retries are handled by the pool
+        self.label = f"...{key[-4:]}"
+        self.requests = deque()   # timestamps
+        self.tokens = deque()     # (timestamp, token count)
+        self.token_total = 0
+        self.cooldown_until = 0.0
+
+    def prune(self, now):
+        while self.requests and now - self.requests[0] > WINDOW_SECONDS:
+            self.requests.popleft()
+        while self.tokens and now - self.tokens[0][0] > WINDOW_SECONDS:
+            self.token_total -= self.tokens.popleft()[1]
+
+    def headroom(self, rpm_limit, tpm_limit, estimated_tokens):
+        """Fraction of the tighter of the two limits still free after this request."""
+        request_room = (rpm_limit - len(self.requests) - 1) / rpm_limit
+        token_room = (tpm_limit - self.token_total - estimated_tokens) / tpm_limit
+        return min(request_room, token_room)
+
+class OpenAIKeyPool:
+    """
+    Spreads OpenAI calls over several API keys.
+
+    Each call goes to the key with the most request/token headroom in the last minute.
+    A 429 puts that key on cooldown (honouring Retry-After) and the call is retried on
+    the next best key, with exponential backoff when every key is exhausted.
+    """
+
+    def __init__(self, keys, rpm_limit=OPENAI_RPM_LIMIT, tpm_limit=OPENAI_TPM_LIMIT, max_retries=OPENAI_MAX_RETRIES):
+        if not keys:
+            raise ValueError("No OpenAI API keys found in the environment variables.")
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.max_retries = max_retries
+        self._keys = [_KeyState(key) for key in keys]
+        self._lock = threading.Lock()
+
+    def _acquire(self, estimated_tokens):
+        """
+        Reserves a request slot on the best key, waiting while every key is cooling down or full.
+        Estimates above the per-key token limit are clamped to it, since such a request could
+        otherwise never fit; it then waits for an empty window instead.
+        """
+        estimated_tokens = self._clamp_tokens(estimated_tokens)
+        while True:
+            with self._lock:
+                now = time.time()
+                best, best_room = None, None
+                for state in self._keys:
+                    state.prune(now)
+                    if state.cooldown_until > now:
+                        continue
+                    room = state.headroom(self.rpm_limit, self.tpm_limit, estimated_tokens)
+                    if best is None or room > best_room:
+                        best, best_room = state, room
+
+                if best is not None and best_room >= 0:
+                    best.requests.append(now)
+                    best.tokens.append((now, estimated_tokens))
+                    best.token_total += estimated_tokens
+                    return best
+
+                # Everything is saturated: wait for the earliest cooldown or window slot to free up
+                wake_times = [s.cooldown_until for s in self._keys if s.cooldown_until > now]
+                wake_times += [s.requests[0] + WINDOW_SECONDS for s in self._keys if s.requests]
+                wait = max(0.05, min(wake_times) - now) if wake_times else 0.5
+            time.sleep(min(wait, MAX_BACKOFF_SECONDS))
+
+    def _clamp_tokens(self, estimated_tokens):
+        return min(estimated_tokens, self.tpm_limit)
+
+    def _record_usage(self, state, estimated_tokens, actual_tokens):
+        """Replaces the reserved token estimate with the real usage once it is known."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            state.tokens.append((time.time(), actual_tokens - estimated_tokens))
+            state.token_total += actual_tokens - estimated_tokens
+
+    def _cool_down(self, state, seconds):
+        with self._lock:
+            state.cooldown_until = max(state.cooldown_until, time.time() + seconds)
+
+    @staticmethod
+    def _retry_after(error, attempt):
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except (TypeError, ValueError):
+                pass
+        return min(MAX_BACKOFF_SECONDS, (2 ** attempt) + random.random())
+
+    def chat_completion(self, messages, model="gpt-4o", **kwargs):
+        """
+        Calls chat.completions.create on the key with the most headroom, retrying
+        rate-limited and transient failures. Extra kwargs (e.g. stream=True) are passed through.
+        """
+        estimated_tokens = self._clamp_tokens(len(json.dumps(messages)) // 4 + DEFAULT_COMPLETION_TOKENS)
+        for attempt in range(self.max_retries + 1):
+            state = self._acquire(estimated_tokens)
+            try:
+                completion = state.client.chat.completions.create(model=model, messages=messages, **kwargs)
+            except openai.RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_after(e, attempt)
+                print(f"[OPENAI] Key {state.label} rate limited, cooling down for {delay:.1f}s")
+                self._cool_down(state, delay)
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_after(e, attempt))
+            else:
+                usage = getattr(completion, "usage", None)
+                self._record_usage(state, estimated_tokens, getattr(usage, "total_tokens", None))
+                return completion
+
+    def stats(self):
+        """Returns per-key request/token counts for the last minute."""
+        with self._lock:
+            now = time.time()
+            result = {}
+            for state in self._keys:
+                state.prune(now)
+                result[state.label] = {
+                    "requests_last_minute": len(state.requests),
+                    "tokens_last_minute": state.token_total,
+                    "cooling_down": state.cooldown_until > now,
+                }
+            return result
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_openai_pool():
+    """Returns the process-wide key pool, created on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OpenAIKeyPool(OPENAI_API_KEYS)
+    return _pool
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import CACHE_DIR, PAPER_INDEX_ENABLED
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+class PaperIndex:
+    """
+    A local store of every paper seen in search results, with full-text search over
+    titles and authors (SQLite FTS5). Papers are stored in the same shape search_papers
+    returns them. Without FTS5 support, searches fall back to LIKE matching.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " id TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " authors TEXT NOT NULL,"
+            " citations INTEGER NOT NULL,"
+            " pdf TEXT,"
+            " external_ids TEXT,"
+            " last_seen REAL NOT NULL)"
+        )
+        try:
+            self._create_fts_table()
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            print("[INDEX] SQLite was built without FTS5; local search falls back to LIKE matching")
+            self.fts_enabled = False
+        self._conn.commit()
+
+    def _create_fts_table(self):
+        """
+        Creates the full-text index as an external-content FTS5 table over `papers`. Its rows share
+        the papers' rowids and triggers keep it in sync, so refreshing a paper touches one FTS row
+        instead of scanning the whole index for it.
+        """
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'papers_fts'").fetchone()
+        if row is not None and "content='papers'" not in row[0]:
+            # Indexes written before the switch to external content are rebuilt below
+            self._conn.execute("DROP TABLE papers_fts")
+            row = None
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+            " title, authors, content='papers', content_rowid='rowid',"
+            " tokenize='unicode61 remove_diacritics 2')"
+        )
+        self._conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, authors) VALUES (new.rowid, new.title, new.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, authors) VALUES ('delete', old.rowid, old.title, old.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF title, authors ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, authors) VALUES ('delete', old.rowid, old.title, old.authors);
+                INSERT INTO papers_fts (rowid, title, authors) VALUES (new.rowid, new.title, new.authors);
+            END;
+        """)
+        if row is None:
+            self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+
+    def add_papers(self, papers):
+        """Inserts or refreshes papers (dicts as returned by search_papers)."""
+        now = time.time()
+        rows = []
+        for paper in papers:
+            if not isinstance(paper, dict) or not paper.get("id"):
+                continue
+            rows.append((
+                str(paper["id"]),
+                paper.get("title") or "Unknown Title",
+                json.dumps(paper.get("authors") or [], ensure_ascii=False),
+                paper.get("citations") or 0,
+                paper.get("pdf"),
+                json.dumps(paper.get("external_ids") or {}),
+                now,
+            ))
+        if not rows:
+            return 0
+
+        with self._lock:
+            # An upsert keeps each paper's rowid, which the FTS triggers key on
+            self._conn.executemany(
+                "INSERT INTO papers (id, title, authors, citations, pdf, external_ids, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET title = excluded.title, authors = excluded.authors,"
+                " citations = excluded.citations, pdf = excluded.pdf, external_ids = excluded.external_ids,"
+                " last_seen = excluded.last_seen",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _match_expression(self, text, prefix_last=False):
+        # Quote every word so user input can never be parsed as FTS5 query syntax
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        if prefix_last:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def _row_to_paper(self, row):
+        paper_id, title, authors, citations, pdf, external_ids = row
+        return {
+            "id": paper_id,
+            "title": title,
+            "authors": json.loads(authors),
+            "citations": citations,
+            "pdf": pdf or "No PDF available",
+            "external_ids": json.loads(external_ids or "{}"),
+        }
+
+    def search(self, query, limit=10):
+        """Returns the best local matches for the query, most relevant first."""
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return []
+
+        with self._lock:
+            if self.fts_enabled:
+                rows = self._conn.execute(
+                    "SELECT p.id, p.title, p.authors, p.citations, p.pdf, p.external_ids"
+                    " FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid"
+                    " WHERE papers_fts MATCH ?"
+                    " ORDER BY bm25(papers_fts), p.citations DESC LIMIT ?",
+                    (self._match_expression(query), limit),
+                ).fetchall()
+            else:
+                clauses = " AND ".join("(lower(title) LIKE ? OR lower(authors) LIKE ?)" for _ in words)
+                params = [f"%{word}%" for word in words for _ in (0, 1)]
+                rows = self._conn.execute(
+                    "SELECT id, title, authors, citations, pdf, external_ids FROM papers"
+                    f" WHERE {clauses} ORDER BY citations DESC LIMIT ?",
+                    params + [limit],
+                ).fetchall()
+        return [self._row_to_paper(row) for row in rows]
+
+    def get_papers(self, paper_ids):
+        """Returns the stored records for the given paper IDs (unknown IDs are skipped)."""
+        paper_ids = [str(pid) for pid in paper_ids]
+        papers = []
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(paper_ids), 500):
+                chunk = paper_ids[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT id, title, authors, citations, pdf, external_ids FROM papers"
+                    f" WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                ).fetchall()
+                papers.extend(self._row_to_paper(row) for row in rows)
+        return papers
+
+    def autocomplete(self, prefix, limit=8):
+        """Suggests titles of known papers matching what has been typed so far (last word as a prefix)."""
+        if not self.fts_enabled:
+            words = _WORD_RE.findall(prefix.lower())
+            if not words:
+                return []
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT title FROM papers WHERE lower(title) LIKE ? ORDER BY citations DESC LIMIT ?",
+                    ("%" + "%".join(words) + "%", limit),
+                ).fetchall()
+            return [row[0] for row in rows]
+
+        expression = self._match_expression(prefix, prefix_last=True)
+        if expression is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.title FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid"
+                " WHERE papers_fts MATCH ? ORDER BY p.citations DESC LIMIT ?",
+                (f"title : ({expression})", limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+_paper_index = PaperIndex(os.path.join(CACHE_DIR, "paper_index.sqlite3")) if PAPER_INDEX_ENABLED else None
+
+# One background writer, so indexing never holds up the search that produced the papers
+_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="paper-index")
+
+def _add_to_index(papers):
+    try:
+        _paper_index.add_papers(papers)
+    except sqlite3.Error as e:
+        print(f"[INDEX] Failed to index papers: {e}")
+
+def index_papers(papers):
+    """
+    Queues search results for the local index and returns at once. Failures are logged,
+    never raised. Returns the Future of the write, or None when there is nothing to index.
+    """
+    if _paper_index is None or not isinstance(papers, list):
+        return None
+    return _index_executor.submit(_add_to_index, papers)
+
+def search_local_papers(query, limit=10):
+    """Searches the papers seen so far without any network call."""
+    if _paper_index is None:
+        return []
+    return _paper_index.search(query, limit)
+
+def lookup_papers(paper_ids):
+    """Returns the indexed records (with external IDs such as CorpusId) of papers seen before."""
+    if _paper_index is None:
+        return []
+    return _paper_index.get_papers(paper_ids)
+
+def autocomplete_titles(prefix, limit=8):
+    """Returns titles of papers seen so far that match the typed prefix."""
+    if _paper_index is None:
+        return []
+    return _paper_index.autocomplete(prefix, limit)
@@ -1,46 +1,212 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
-PAPER_SEARCH_URL = "http://recommendpapers.xyz/api/paper_search"
+from api.http_client import upstream_get
+from api.disk_cache import DiskCache
+from api.singleflight import SingleFlight, AsyncSingleFlight
+from api.paper_index import index_papers
+from config import CACHE_DIR, SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL, SEARCH_CACHE_MAX_ENTRIES
+from config import SEARCH_PAGE_SIZE, SEARCH_BULK_PAGE_SIZE, SEARCH_MAX_RESULTS, SEARCH_PAGE_WORKERS
+
+SEARCH_FIELDS = "title,authors,citationCount,externalIds,paperId"
+
+_search_cache = DiskCache(
+    os.path.join(CACHE_DIR, "paper_search.sqlite3"),
+    ttl=SEARCH_CACHE_TTL,
+    stale_ttl=SEARCH_CACHE_STALE_TTL,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+)
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+# Identical searches that miss the cache at the same time share one upstream request
+_search_flight = SingleFlight()
+_async_search_flight = AsyncSingleFlight()
+
+def normalize_query(query):
+    """Lowercases the query and collapses whitespace so equivalent searches share a cache entry."""
+    return " ".join(str(query).lower().split())
+
+def _search_cache_key(params):
+    key_params = dict(params)
+    key_params["query"] = normalize_query(key_params["query"])
+    return json.dumps(key_params, sort_keys=True)
+
+def _fetch_papers(params):
+    """Calls the paper_search endpoint and parses the response into paper dicts."""
+    # Fetch data from API
+    response = upstream_get("paper_search", params=params)
+    response.raise_for_status()  # Raise error if request fails
+    return _parse_papers(response.json())
+
+def _parse_papers(api_response):
+    """Parses a paper_search API response into paper dicts."""
+    # Ensure 'papers' key exists and is a list
+    if not isinstance(api_response.get("papers"), list):
+        return {"error": "'papers' should be a list but got something else."}
+
+    # Parse the papers
+    papers = []
+    for paper in api_response["papers"]:
+        external_ids = paper.get("externalIds", {})
+        corpus_id = external_ids.get("CorpusId", "Unknown")
+
+        # Safe handling for missing PDF links
+        pdf_links = paper.get("pdfs", [])
+        pdf_url = pdf_links[0] if pdf_links else "No PDF available"
+
+        papers.append({
+            "id": paper.get("paperId", corpus_id),  # Use paperId if available, else CorpusId
+            "title": paper.get("title", "Unknown Title"),
+            "authors": [author.get("name", "Unknown") for author in paper.get("authors", [])],
+            "citations": paper.get("citationCount", 0),
+            "pdf": pdf_url,  # Safe PDF handling
+            "external_ids": external_ids  # Include all external IDs (ArXiv, DOI, etc.)
+        })
+
+    return papers
+
+def _fetch_and_store(key, params):
+    papers = _fetch_papers(params)
+    if isinstance(papers, list):
+        _search_cache.set(key, papers)
+        index_papers(papers)
+    return papers
+
+def _revalidate(key, params):
+    try:
+        _search_flight.do(key, _fetch_and_store, key, params)
+    except Exception as e:
+        print(f"[CACHE] Background refresh failed for {params['query']!r}: {e}")
+    finally:
+        with _revalidating_lock:
+            _revalidating.discard(key)
+
+def _revalidate_in_background(key, params):
+    """Refreshes a stale cache entry on a daemon thread, at most once per key at a time."""
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+    threading.Thread(target=_revalidate, args=(key, params), daemon=True).start()
 
-def search_papers(query):
-    """Fetches and parses research papers from the API."""
+def _search_params(query, limit=SEARCH_PAGE_SIZE, offset=0):
     params = {
         "query": query,
-        "limit": 10,  # Fetch 3 results
-        "fields": "title,authors,citationCount,externalIds,paperId",
+        "limit": limit,
+        "fields": SEARCH_FIELDS,
         "get_pdfs": "True"
     }
+    # Only sent for later pages, so first-page requests (and their cache keys) stay unchanged
+    if offset:
+        params["offset"] = offset
+    return params
 
-    try:
-        # Fetch data from API
-        response = requests.get(PAPER_SEARCH_URL, params=params)
-        response.raise_for_status()  # Raise error if request fails
-        api_response = response.json()
-
-        # Ensure 'papers' key exists and is a list
-        if not isinstance(api_response.get("papers"), list):
-            return {"error": "'papers' should be a list but got something else."}
-
-        # Parse the papers
-        papers = []
-        for paper in api_response["papers"]:
-            external_ids = paper.get("externalIds", {})
-            corpus_id = external_ids.get("CorpusId", "Unknown")
-
-            # Safe handling for missing PDF links
-            pdf_links = paper.get("pdfs", [])
-            pdf_url = pdf_links[0] if pdf_links else "No PDF available"
-
-            papers.append({
-                "id": paper.get("paperId", corpus_id),  # Use paperId if available, else CorpusId
-                "title": paper.get("title", "Unknown Title"),
-                "authors": [author.get("name", "Unknown") for author in paper.get("authors", [])],
-                "citations": paper.get("citationCount", 0),
-                "pdf": pdf_url,  # Safe PDF handling
-                "external_ids": external_ids  # Include all external IDs (ArXiv, DOI, etc.)
-            })
+def search_papers(query, limit=SEARCH_PAGE_SIZE, offset=0):
+    """
+    Fetches and parses research papers from the API.
+    Results are cached on disk by normalized query and request params (including the
+    page offset, so every page is cached independently); stale entries are returned
+    immediately and refreshed in the background.
+    """
+    params = _search_params(query, limit, offset)
 
+    key = _search_cache_key(params)
+    entry = _search_cache.get_entry(key)
+    if entry is not None:
+        papers, is_stale = entry
+        if is_stale:
+            _revalidate_in_background(key, params)
         return papers
 
+    try:
+        return _search_flight.do(key, _fetch_and_store, key, params)
+
     except requests.RequestException as e:
         return {"error": str(e)}
+
+async def search_papers_async(query, limit=SEARCH_PAGE_SIZE, offset=0):
+    """
+    Async variant of search_papers for the ASGI app. Shares the same cache, but
+    fetches misses through the async client so concurrent searches overlap their waits.
+    The SQLite cache is read and written on a worker thread to keep the event loop free.
+    """
+    # Imported here so the synchronous app does not need httpx installed
+    import httpx
+    from api.async_http_client import async_upstream_get
+
+    params = _search_params(query, limit, offset)
+
+    key = _search_cache_key(params)
+    entry = await asyncio.to_thread(_search_cache.get_entry, key)
+    if entry is not None:
+        papers, is_stale = entry
+        if is_stale:
+            _revalidate_in_background(key, params)
+        return papers
+
+    async def fetch_and_store():
+        response = await async_upstream_get("paper_search", params=params)
+        response.raise_for_status()
+        papers = _parse_papers(response.json())
+        if isinstance(papers, list):
+            await asyncio.to_thread(_search_cache.set, key, papers)
+            index_papers(papers)
+        return papers
+
+    try:
+        return await _async_search_flight.do(key, fetch_and_store)
+
+    # ValueError covers a response body that is not valid JSON
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": str(e)}
+
+def iter_search_pages(query, page_size=SEARCH_BULK_PAGE_SIZE, max_results=SEARCH_MAX_RESULTS, max_workers=SEARCH_PAGE_WORKERS):
+    """
+    Yields pages of search results (lists of paper dicts) in order as they arrive.
+    Bulk scans default to the upstream maximum page size to keep round trips down;
+    SEARCH_PAGE_SIZE is only for what the UI shows per page.
+    Up to max_workers pages are requested at once; the scan stops at max_results,
+    at the first short or empty page, or on an error.
+    """
+    offsets = list(range(0, max_results, page_size))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for window_start in range(0, len(offsets), max_workers):
+            window = offsets[window_start:window_start + max_workers]
+            futures = [
+                executor.submit(search_papers, query, min(page_size, max_results - offset), offset)
+                for offset in window
+            ]
+            for offset, future in zip(window, futures):
+                page = future.result()
+                if not isinstance(page, list):
+                    return
+                if page:
+                    yield page
+                if len(page) < min(page_size, max_results - offset):
+                    return
+
+def rank_by_citations(papers, top_k=None):
+    """Merges papers from several pages, dropping repeated IDs, and orders them by citation count."""
+    merged = {}
+    for paper in papers:
+        merged.setdefault(str(paper.get("id")), paper)
+    ranked = sorted(merged.values(), key=lambda p: p.get("citations") or 0, reverse=True)
+    return ranked[:top_k] if top_k else ranked
+
+def collect_search_results(query, max_results=SEARCH_MAX_RESULTS, page_size=SEARCH_BULK_PAGE_SIZE, top_k_by_citations=None):
+    """
+    Collects up to max_results papers across pages. When top_k_by_citations is set, returns
+    only the top-k most cited papers of the merged pages instead of upstream order.
+    """
+    papers = []
+    for page in iter_search_pages(query, page_size, max_results):
+        papers.extend(page)
+    if top_k_by_citations:
+        return rank_by_citations(papers, top_k_by_citations)
+    return papers
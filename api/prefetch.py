@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from api.citations import fetch_citations_fragment, format_citations_box
+from api.bibtex import fetch_bibtex_text, format_bibtex_fragment, format_bibtex_box
+from config import PREFETCH_MAX_WORKERS, WARMUP_TOP_K
+
+def _citations_html(pid, paper_title_map):
+    return format_citations_box(fetch_citations_fragment(pid, paper_title_map.get(pid, pid)))
+
+def _bibtex_html(pid, paper_title_map, papers):
+    return format_bibtex_box(format_bibtex_fragment(paper_title_map.get(pid, pid), fetch_bibtex_text(pid, papers)))
+
+def prefetch_paper_details(paper_ids, paper_title_map, papers=None, max_workers=PREFETCH_MAX_WORKERS):
+    """
+    Fetches citations and BibTeX for every paper concurrently on a bounded thread pool.
+    Yields (paper_id, citations_html, bibtex_html) as soon as both lookups for that paper
+    have finished, so callers can show each paper without waiting for the slowest one.
+
+    :param paper_ids: List of paper IDs (strings).
+    :param paper_title_map: Dict mapping paper_id to paper title.
+    :param papers: Optional list of paper dicts, used by the BibTeX fallback.
+    :param max_workers: Maximum number of upstream lookups in flight at once.
+    """
+    if not paper_ids:
+        return
+
+    pending = {pid: {} for pid in paper_ids}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for pid in paper_ids:
+            futures[executor.submit(_citations_html, pid, paper_title_map)] = (pid, "citations")
+            futures[executor.submit(_bibtex_html, pid, paper_title_map, papers)] = (pid, "bibtex")
+
+        for future in as_completed(futures):
+            pid, kind = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = f"<p>Error retrieving {kind} for paper {pid}: {str(e)}</p>"
+
+            pending[pid][kind] = result
+            if len(pending[pid]) == 2:
+                done = pending.pop(pid)
+                yield pid, done["citations"], done["bibtex"]
+
+def _warm(paper_ids, paper_title_map, papers, citations_cache, bibtex_cache):
+    # The lookups go through the same single-flight/disk-cache layer as user clicks, so a click on a
+    # paper that is being warmed joins the in-flight lookup instead of repeating it. setdefault keeps
+    # whichever result lands first, so the warmer never overwrites what a click already stored.
+    for pid in paper_ids:
+        try:
+            if pid not in citations_cache:
+                citations_cache.setdefault(pid, _citations_html(pid, paper_title_map))
+            if pid not in bibtex_cache:
+                bibtex_cache.setdefault(pid, _bibtex_html(pid, paper_title_map, papers))
+        except Exception as e:
+            print(f"[WARMUP] Failed to warm paper {pid}: {e}")
+
+def warm_paper_details(paper_ids, paper_title_map, papers, citations_cache, bibtex_cache, top_k=WARMUP_TOP_K):
+    """
+    Speculatively fills the citation and BibTeX caches for the top_k papers.
+    Runs on a single low-priority daemon thread, one lookup at a time, so it never
+    competes with lookups the user is actually waiting for.
+
+    :param citations_cache: Dict paper_id → citations HTML, updated in place.
+    :param bibtex_cache: Dict paper_id → BibTeX HTML, updated in place.
+    :return: The started thread, or None when there is nothing to warm.
+    """
+    targets = [pid for pid in paper_ids[:top_k] if pid not in citations_cache or pid not in bibtex_cache]
+    if not targets:
+        return None
+
+    thread = threading.Thread(
+        target=_warm,
+        args=(targets, dict(paper_title_map), papers, citations_cache, bibtex_cache),
+        daemon=True,
+    )
+    thread.start()
+    return thread
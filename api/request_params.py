@@ -0,0 +1,38 @@
+def parse_int_param(value, default, minimum=0, maximum=None):
+    """
+    Parses an integer request parameter. Missing values give `default`, values above
+    `maximum` are clamped to it.
+
+    :raises ValueError: If the value is not an integer or is below `minimum`.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"expected an integer, got {value!r}")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"expected an integer, got {value!r}")
+    if isinstance(value, float) and value != number:
+        raise ValueError(f"expected an integer, got {value!r}")
+    if number < minimum:
+        raise ValueError(f"must be at least {minimum}, got {number}")
+    if maximum is not None:
+        number = min(number, maximum)
+    return number
+
+def parse_id_list(value, maximum):
+    """
+    Parses a list of paper IDs from a JSON body into strings.
+
+    :raises ValueError: If the value is not a non-empty list of strings or integers,
+        or has more than `maximum` items.
+    """
+    if not isinstance(value, list) or not value:
+        raise ValueError("expected a non-empty list of paper IDs")
+    if len(value) > maximum:
+        raise ValueError(f"at most {maximum} paper IDs per request, got {len(value)}")
+    for item in value:
+        if isinstance(item, bool) or not isinstance(item, (str, int)) or not str(item).strip():
+            raise ValueError(f"expected paper IDs as strings or integers, got {item!r}")
+    return [str(item).strip() for item in value]
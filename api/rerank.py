@@ -0,0 +1,105 @@
+import re
+import zlib
+
+import numpy as np
+
+from api.keyphrase import STOPWORDS, DOMAIN_STOPWORDS, expand_abbreviation
+from api.llm_cache import LRUCache
+from config import RERANK_CITATION_WEIGHT, RERANK_VECTOR_CACHE_ENTRIES
+
+# Hashed feature space: terms are bucketed with crc32, so no vocabulary has to be kept
+HASH_BITS = 20
+HASH_DIM = 1 << HASH_BITS
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#\-]*|\d+")
+_IGNORED_WORDS = STOPWORDS | DOMAIN_STOPWORDS
+
+# paper id + title -> (term hashes, term counts), so titles are only tokenized once
+_vector_cache = LRUCache(RERANK_VECTOR_CACHE_ENTRIES)
+
+def _terms(text):
+    """Lowercased content words (abbreviations expanded) plus adjacent-word bigrams."""
+    words = []
+    for token in _WORD_RE.findall(text or ""):
+        expansion = expand_abbreviation(token)
+        if expansion:
+            words.extend(expansion.split())
+        elif token.lower() not in _IGNORED_WORDS:
+            words.append(token.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def hash_terms(text):
+    """Returns (unique term hashes, counts) as int64/float32 arrays for a piece of text."""
+    hashes = [zlib.crc32(term.encode("utf-8")) & (HASH_DIM - 1) for term in _terms(text)]
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    unique, counts = np.unique(np.asarray(hashes, dtype=np.int64), return_counts=True)
+    return unique, counts.astype(np.float32)
+
+def paper_vector(paper):
+    """Hashed term counts for a paper's title, cached per paper."""
+    key = (str(paper.get("id")), paper.get("title") or "")
+    vector = _vector_cache.get(key)
+    if vector is None:
+        vector = hash_terms(key[1])
+        _vector_cache.set(key, vector)
+    return vector
+
+def similarity_scores(query, papers):
+    """
+    Cosine similarity between the query and every paper title under TF-IDF weighting,
+    with IDF taken from the candidate set itself. Returns a float array aligned with papers.
+    """
+    n = len(papers)
+    query_terms, query_counts = hash_terms(query)
+    if n == 0 or query_terms.size == 0:
+        return np.zeros(n, dtype=np.float32)
+
+    vectors = [paper_vector(paper) for paper in papers]
+    lengths = np.fromiter((v[0].size for v in vectors), dtype=np.int64, count=n)
+    if lengths.sum() == 0:
+        return np.zeros(n, dtype=np.float32)
+    rows = np.repeat(np.arange(n), lengths)
+    terms = np.concatenate([v[0] for v in vectors])
+    counts = np.concatenate([v[1] for v in vectors])
+
+    # Every paper lists a term once, so occurrences across the flat array are document frequencies
+    unique_terms, inverse, df = np.unique(terms, return_inverse=True, return_counts=True)
+    idf = np.log((n + 1) / (df + 1)).astype(np.float32) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[inverse]
+    doc_norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+
+    # Query terms that no candidate contains get the highest possible IDF
+    positions = np.searchsorted(unique_terms, query_terms)
+    positions = np.minimum(positions, unique_terms.size - 1)
+    known = unique_terms[positions] == query_terms
+    query_idf = np.where(known, idf[positions], np.log(n + 1) + 1.0)
+    query_weights = (1.0 + np.log(query_counts)) * query_idf
+    query_norm = np.sqrt(np.dot(query_weights, query_weights))
+
+    # Look up the query weight of every (paper, term) pair at once (query_terms is sorted)
+    query_positions = np.minimum(np.searchsorted(query_terms, terms), query_terms.size - 1)
+    matched_weights = np.where(query_terms[query_positions] == terms, query_weights[query_positions], 0.0)
+    dots = np.bincount(rows, weights=weights * matched_weights, minlength=n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(doc_norms > 0, dots / (doc_norms * query_norm), 0.0)
+    return scores.astype(np.float32)
+
+def rerank_papers(query, papers, citation_weight=RERANK_CITATION_WEIGHT):
+    """
+    Orders papers by similarity of their titles to the query, blended with citation count
+    (log-scaled to [0, 1] within the candidates). Ties keep their upstream order.
+    """
+    if not papers or not query:
+        return list(papers or [])
+
+    similarity = similarity_scores(query, papers)
+    citations = np.log1p(np.fromiter((max(p.get("citations") or 0, 0) for p in papers), dtype=np.float64, count=len(papers)))
+    if citations.max() > 0:
+        citations /= citations.max()
+    blended = (1.0 - citation_weight) * similarity + citation_weight * citations
+
+    # Stable sort on the negated score keeps upstream order among equal scores
+    order = np.argsort(-blended, kind="stable")
+    return [papers[i] for i in order]
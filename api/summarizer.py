@@ -1,11 +1,15 @@
-from config import get_openai_api_key
-from openai import OpenAI
+from config import CACHE_DIR, SUMMARY_MAX_WORKERS
+from api.llm_cache import cached_chat_completion, stream_cached_chat_completion, accumulate_stream
+from api.disk_cache import DiskCache
+from api.concurrency import iter_fan_out
 import os
 
-os.environ["OPENAI_API_KEY"] = get_openai_api_key()
-client = OpenAI()
+# Bump whenever the single-paper prompt changes so old summaries are not reused
+SUMMARY_PROMPT_VERSION = "v1"
 
-def summarize_papers(paper_ids, paper_title_map):
+_paper_summary_cache = DiskCache(os.path.join(CACHE_DIR, "paper_summaries.sqlite3"), max_entries=20000)
+
+def build_summary_prompt(paper_ids, paper_title_map):
     selected_ids = paper_ids
 
     paper_infos = []
@@ -27,16 +31,9 @@ def summarize_papers(paper_ids, paper_title_map):
         f"### Papers:\n" + "\n".join(paper_infos) +
         "\n\nGenerate the markdown-formatted summaries below."
     )
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        summary = completion.choices[0].message.content
-    except Exception as e:
-        summary = f"❌ Error generating summary: {str(e)}"
+    return prompt
 
+def format_summary_html(summary):
     html = f"""
     <div class="citation-box">
         <h2>Paper Summaries</h2>
@@ -44,3 +41,81 @@ def summarize_papers(paper_ids, paper_title_map):
     </div>
     """
     return html
+
+def summarize_papers(paper_ids, paper_title_map):
+    prompt = build_summary_prompt(paper_ids, paper_title_map)
+
+    try:
+        summary = cached_chat_completion([{"role": "user", "content": prompt}])
+    except Exception as e:
+        summary = f"❌ Error generating summary: {str(e)}"
+
+    return format_summary_html(summary)
+
+def stream_summarize_papers(paper_ids, paper_title_map):
+    """Streams the summaries, yielding the HTML rendered so far as tokens arrive."""
+    prompt = build_summary_prompt(paper_ids, paper_title_map)
+    summary = ""
+
+    try:
+        for summary in accumulate_stream(stream_cached_chat_completion([{"role": "user", "content": prompt}])):
+            yield format_summary_html(summary)
+    except Exception as e:
+        summary += f"\n\n❌ Error generating summary: {str(e)}"
+        yield format_summary_html(summary)
+
+def build_single_summary_prompt(title):
+    prompt = (
+        "You are an academic research assistant. Your goal is to generate a structured summary of the following paper **based only on its title**. "
+        "Do not invent specific data, but you can infer **general methods, contributions, and challenges** based on standard research naming conventions.\n\n"
+        "**Instructions:**\n"
+        "1. Use clear, readable markdown formatting with bullet points.\n"
+        "2. Do not repeat the paper title as a heading.\n"
+        "3. Structure the summary with these sections:\n"
+        "   - **Likely Research Focus**\n"
+        "   - **Probable Methodologies or Approaches**\n"
+        "   - **Expected Results or Applications**\n"
+        "   - **Potential Challenges or Limitations**\n\n"
+        f"### Paper:\n- {title}\n\n"
+        "Generate the markdown-formatted summary below."
+    )
+    return prompt
+
+def summarize_single_paper(pid, paper_title_map):
+    """Returns the markdown summary of one paper, cached by paper ID and prompt version."""
+    cache_key = f"{SUMMARY_PROMPT_VERSION}:{pid}"
+    summary = _paper_summary_cache.get(cache_key)
+    if summary is not None:
+        return summary
+
+    title = paper_title_map.get(pid, "Unknown Title")
+    prompt = build_single_summary_prompt(title)
+    summary = cached_chat_completion([{"role": "user", "content": prompt}])
+    _paper_summary_cache.set(cache_key, summary)
+    return summary
+
+def _assemble_summaries(paper_ids, paper_title_map, summaries):
+    sections = []
+    for pid in paper_ids:
+        if pid in summaries:
+            sections.append(f"### {paper_title_map.get(pid, 'Unknown Title')}\n{summaries[pid]}")
+    return "\n\n".join(sections)
+
+def stream_summarize_papers_per_paper(paper_ids, paper_title_map, max_workers=SUMMARY_MAX_WORKERS):
+    """
+    Summarizes each paper independently on a bounded worker pool and yields the
+    assembled HTML every time another paper's summary is ready. Papers that were
+    summarized before come straight from the cache, so changing the selection only
+    costs one LLM call per newly added paper.
+    """
+    summaries = {}
+    for pid, summary, error in iter_fan_out(lambda pid: summarize_single_paper(pid, paper_title_map), paper_ids, max_workers):
+        summaries[pid] = summary if error is None else f"❌ Error generating summary: {str(error)}"
+        yield format_summary_html(_assemble_summaries(paper_ids, paper_title_map, summaries))
+
+def summarize_papers_per_paper(paper_ids, paper_title_map, max_workers=SUMMARY_MAX_WORKERS):
+    """Non-streaming variant of stream_summarize_papers_per_paper. Returns the final HTML."""
+    html = format_summary_html("")
+    for html in stream_summarize_papers_per_paper(paper_ids, paper_title_map, max_workers):
+        pass
+    return html
@@ -1,30 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask import render_template
 from flask_cors import CORS
-from api.paper_search import search_papers
+from api.intents import handle_intents, handle_top_cited
+from api.request_params import parse_int_param, parse_id_list
+from config import MAX_SEARCH_OFFSET, SEARCH_MAX_RESULTS, MAX_LOCAL_RESULTS, BIB_EXPORT_MAX_IDS
+from api.paper_index import search_local_papers, autocomplete_titles
+from api.bib_export import iter_bib_entries
 
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
-def handle_intents(user_message):
-    print("Received query:", user_message)
-    papers = search_papers(user_message)
-    print("Papers returned:", papers)
-    if not papers or ("error" in papers):
-        response_text = "❌ Sorry, I couldn't find any papers on that topic."
-    else:
-        response_text = "**Here are some relevant research papers:**\n\n"
-        for i, paper in enumerate(papers, 1):
-            response_text += (
-                f"**{i}. {paper['title']}**\n"
-                f"🔗 {'[PDF Available]('+paper['pdf']+')' if paper['pdf'] != 'No PDF available' else 'No PDF available'}\n"
-                f"👥 Authors: {', '.join(paper['authors'])}\n"
-                f"📊 Citations: {paper['citations']}\n\n"
-            )
-    return {"response": response_text, "papers": papers}
-
 @app.route("/")
 def homepage():
     return render_template("home.html")
@@ -37,8 +24,60 @@ def chatbot():
         return jsonify({"error": "No message provided"}), 400
 
     user_message = data["message"]
-    response = handle_intents(user_message)
+    try:
+        offset = parse_int_param(data.get("offset"), 0, maximum=MAX_SEARCH_OFFSET)  # Optional: fetch a later page of results
+    except ValueError as e:
+        return jsonify({"error": f"Invalid offset: {e}"}), 400
+    try:
+        # Optional: return the top_k most cited of up to SEARCH_MAX_RESULTS papers instead of one page
+        top_k = parse_int_param(data.get("top_k"), None, minimum=1, maximum=SEARCH_MAX_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid top_k: {e}"}), 400
+    if top_k:
+        return jsonify(handle_top_cited(user_message, top_k))
+    query_text = data.get("query")  # Optional: the user's original query, used to re-rank results
+    response = handle_intents(user_message, offset, query_text)
     return jsonify(response)
 
+@app.route("/local_search", methods=["GET"])
+def local_search():
+    """Searches papers already seen in earlier searches, without calling the upstream API."""
+    query = request.args.get("q", "")
+    try:
+        limit = parse_int_param(request.args.get("limit"), 10, minimum=1, maximum=MAX_LOCAL_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid limit: {e}"}), 400
+    return jsonify({"papers": search_local_papers(query, limit)})
+
+@app.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    """Suggests titles of known papers for the text typed so far."""
+    prefix = request.args.get("q", "")
+    try:
+        limit = parse_int_param(request.args.get("limit"), 8, minimum=1, maximum=MAX_LOCAL_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid limit: {e}"}), 400
+    return jsonify({"suggestions": autocomplete_titles(prefix, limit)})
+
+@app.route("/export_bib", methods=["POST"])
+def export_bib():
+    """Streams a .bib file for the posted paper IDs, one entry at a time as lookups finish."""
+    data = request.get_json()
+    if not data or not data.get("paper_ids"):
+        return jsonify({"error": "No paper_ids provided"}), 400
+
+    try:
+        paper_ids = parse_id_list(data["paper_ids"], BIB_EXPORT_MAX_IDS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid paper_ids: {e}"}), 400
+    papers = data.get("papers")  # Optional: paper dicts from a search, used when the lookup fails
+    if papers is not None and not (isinstance(papers, list) and all(isinstance(p, dict) for p in papers)):
+        return jsonify({"error": "Invalid papers: expected a list of paper objects"}), 400
+    return Response(
+        stream_with_context(iter_bib_entries(paper_ids, papers)),
+        mimetype="application/x-bibtex",
+        headers={"Content-Disposition": "attachment; filename=references.bib"},
+    )
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,65 @@
+import asyncio
+
+from quart import Quart, request, jsonify
+from quart_cors import cors
+from api.intents import handle_intents_async, handle_top_cited
+from api.async_http_client import close_async_client
+from api.request_params import parse_int_param
+from config import MAX_SEARCH_OFFSET, SEARCH_MAX_RESULTS, MAX_LOCAL_RESULTS
+from api.paper_index import search_local_papers, autocomplete_titles
+
+
+# Async (ASGI) variant of app.py: upstream waits for concurrent /chatbot requests
+# overlap on one event loop. Run with: hypercorn asgi_app:app --bind 127.0.0.1:5000
+app = Quart(__name__)
+app = cors(app)  # Enable CORS for frontend communication
+
+@app.after_serving
+async def shutdown():
+    await close_async_client()
+
+@app.route("/chatbot", methods=["POST"])
+async def chatbot():
+    """Handles user queries and executes the search function without blocking the event loop."""
+    data = await request.get_json()
+    if not data or "message" not in data:
+        return jsonify({"error": "No message provided"}), 400
+
+    user_message = data["message"]
+    try:
+        offset = parse_int_param(data.get("offset"), 0, maximum=MAX_SEARCH_OFFSET)  # Optional: fetch a later page of results
+    except ValueError as e:
+        return jsonify({"error": f"Invalid offset: {e}"}), 400
+    try:
+        # Optional: return the top_k most cited of up to SEARCH_MAX_RESULTS papers instead of one page
+        top_k = parse_int_param(data.get("top_k"), None, minimum=1, maximum=SEARCH_MAX_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid top_k: {e}"}), 400
+    if top_k:
+        return jsonify(await asyncio.to_thread(handle_top_cited, user_message, top_k))
+    query_text = data.get("query")  # Optional: the user's original query, used to re-rank results
+    response = await handle_intents_async(user_message, offset, query_text)
+    return jsonify(response)
+
+@app.route("/local_search", methods=["GET"])
+async def local_search():
+    """Searches papers already seen in earlier searches, without calling the upstream API."""
+    query = request.args.get("q", "")
+    try:
+        limit = parse_int_param(request.args.get("limit"), 10, minimum=1, maximum=MAX_LOCAL_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid limit: {e}"}), 400
+    return jsonify({"papers": await asyncio.to_thread(search_local_papers, query, limit)})
+
+@app.route("/autocomplete", methods=["GET"])
+async def autocomplete():
+    """Suggests titles of known papers for the text typed so far."""
+    prefix = request.args.get("q", "")
+    try:
+        limit = parse_int_param(request.args.get("limit"), 8, minimum=1, maximum=MAX_LOCAL_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid limit: {e}"}), 400
+    return jsonify({"suggestions": await asyncio.to_thread(autocomplete_titles, prefix, limit)})
+
+if __name__ == "__main__":
+    app.run()
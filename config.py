@@ -5,11 +5,150 @@ from dotenv import load_dotenv
 # Load environment variables from .env
 load_dotenv()
 
-# Store API keys in a list
-OPENAI_API_KEYS = list(filter(None, [os.getenv("OPENAI_API_KEY_1"), os.getenv("OPENAI_API_KEY_2")]))
+# Store API keys in a list (OPENAI_API_KEY_1, OPENAI_API_KEY_2, ... in order)
+OPENAI_API_KEYS = [
+    os.environ[name]
+    for name in sorted(
+        (n for n in os.environ if n.startswith("OPENAI_API_KEY_") and n[len("OPENAI_API_KEY_"):].isdigit()),
+        key=lambda n: int(n[len("OPENAI_API_KEY_"):]),
+    )
+    if os.environ[name]
+]
 
 def get_openai_api_key():
-    """Returns a random OpenAI API key to distribute requests."""
+    """
+    Returns a random OpenAI API key. GPT calls go through api.openai_pool, which
+    balances keys by rate-limit headroom; this is kept for scripts that need a single key.
+    """
     if not OPENAI_API_KEYS:
         raise ValueError("No OpenAI API keys found in the environment variables.")
     return random.choice(OPENAI_API_KEYS)
+
+# Maximum number of concurrent citation/BibTeX lookups made while prefetching search results
+PREFETCH_MAX_WORKERS = int(os.getenv("PREFETCH_MAX_WORKERS", "8"))
+
+# Shared upstream HTTP client settings (recommendpapers.xyz)
+UPSTREAM_BASE_URL = os.getenv("UPSTREAM_BASE_URL", "http://recommendpapers.xyz/api")
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "20"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_BACKOFF_FACTOR = float(os.getenv("UPSTREAM_BACKOFF_FACTOR", "0.5"))
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "32"))
+
+# Directory for persistent caches (SQLite files)
+CACHE_DIR = os.getenv("DELVEDEEP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# Paper search cache: entries are fresh for SEARCH_CACHE_TTL seconds, then served stale
+# (and refreshed in the background) for another SEARCH_CACHE_STALE_TTL seconds
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(6 * 60 * 60)))
+SEARCH_CACHE_STALE_TTL = int(os.getenv("SEARCH_CACHE_STALE_TTL", str(24 * 60 * 60)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+# GPT completion cache: an in-memory LRU tier in front of an on-disk tier
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "20000"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 60 * 60)))
+
+# Use GPT-4o to format BibTeX only when the upstream lookup and the local builder both fail
+BIBTEX_GPT_FALLBACK = os.getenv("BIBTEX_GPT_FALLBACK", "false").lower() in ("1", "true", "yes")
+
+# Maximum number of concurrent upstream requests made by one batch citation/BibTeX call
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+# How search results load citations/BibTeX: "lazy" fetches them when a paper's details are
+# requested (warming the top WARMUP_TOP_K papers in the background), "eager" prefetches all
+PAPER_DETAILS_MODE = os.getenv("PAPER_DETAILS_MODE", "lazy").lower()
+WARMUP_TOP_K = int(os.getenv("WARMUP_TOP_K", "2"))
+
+# "combined" summarizes all selected papers in one streamed prompt; "per_paper" summarizes each paper
+# independently (in parallel, cached by paper ID) and shows each summary once it is complete
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "combined").lower()
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+
+# Maximum simultaneous upstream connections held by the async client used by asgi_app.py
+ASYNC_UPSTREAM_MAX_CONNECTIONS = int(os.getenv("ASYNC_UPSTREAM_MAX_CONNECTIONS", "200"))
+
+# Gradio queue: how many events of each handler run at once, and how many may wait in line
+GRADIO_CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "16"))
+GRADIO_QUEUE_MAX_SIZE = int(os.getenv("GRADIO_QUEUE_MAX_SIZE", "256"))
+
+# How the Gradio frontend runs searches: "inprocess" calls the search/intent layer directly,
+# "http" posts to the Flask/ASGI backend at CHATBOT_URL
+SEARCH_TRANSPORT = os.getenv("SEARCH_TRANSPORT", "inprocess").lower()
+CHATBOT_URL = os.getenv("CHATBOT_URL", "http://127.0.0.1:5000/chatbot")
+
+# Uploaded document ingestion caps: pages read from a PDF, bytes of raw text read from any
+# file, and characters of salient text (title, abstract, headings) appended to the query
+INGEST_MAX_PAGES = int(os.getenv("INGEST_MAX_PAGES", "40"))
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(2 * 1024 * 1024)))
+INGEST_MAX_CHARS = int(os.getenv("INGEST_MAX_CHARS", "4000"))
+
+# Parallel PDF text extraction on a process pool. It only kicks in for documents read to at least
+# PDF_PARALLEL_MIN_PAGES pages, so it stays off unless INGEST_MAX_PAGES is raised to that
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(8, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "200"))
+
+# Try the local keyphrase extractor before asking GPT-4o for a search phrase
+LOCAL_KEYPHRASE_ENABLED = os.getenv("LOCAL_KEYPHRASE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Per-key OpenAI rate limits used by the key pool to spread load, and how often a
+# rate-limited or failed call is retried (on the key with the most headroom)
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "30000"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# Paginated search: results per page (the first page is what a search shows), results per
+# request for bulk scans (the upstream maximum), the most results one paginated scan may
+# collect, and how many pages are fetched at once
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_BULK_PAGE_SIZE = int(os.getenv("SEARCH_BULK_PAGE_SIZE", "100"))
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "500"))
+SEARCH_PAGE_WORKERS = int(os.getenv("SEARCH_PAGE_WORKERS", "4"))
+# Deepest result offset a client may request from /chatbot (upstream search stops at 1,000 results)
+MAX_SEARCH_OFFSET = int(os.getenv("MAX_SEARCH_OFFSET", "1000"))
+
+# Citation paging: citations per "Load More Citations" page, and how long fetched pages are cached
+CITATION_PAGE_SIZE = int(os.getenv("CITATION_PAGE_SIZE", "10"))
+CITATION_CACHE_TTL = int(os.getenv("CITATION_CACHE_TTL", str(24 * 60 * 60)))
+CITATION_CACHE_MAX_ENTRIES = int(os.getenv("CITATION_CACHE_MAX_ENTRIES", "20000"))
+
+# Citation graph exploration: hops crawled out from the selected papers, citing papers
+# followed per node, a cap on total nodes, and concurrent lookups across the whole crawl
+GRAPH_MAX_HOPS = int(os.getenv("GRAPH_MAX_HOPS", "2"))
+GRAPH_FANOUT_PER_NODE = int(os.getenv("GRAPH_FANOUT_PER_NODE", "20"))
+GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "2000"))
+GRAPH_MAX_WORKERS = int(os.getenv("GRAPH_MAX_WORKERS", "8"))
+
+# Local full-text index of every paper seen in search results, queried before/alongside upstream
+PAPER_INDEX_ENABLED = os.getenv("PAPER_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+LOCAL_PREVIEW_RESULTS = int(os.getenv("LOCAL_PREVIEW_RESULTS", "5"))
+# Most results /local_search and /autocomplete return per request
+MAX_LOCAL_RESULTS = int(os.getenv("MAX_LOCAL_RESULTS", "100"))
+
+# Local re-ranking: the first RERANK_CANDIDATES upstream results (one request, at most the
+# upstream page limit of 100) are scored against the user's query (hashed TF-IDF over titles)
+# blended with citation count, then served page by page
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_CITATION_WEIGHT = float(os.getenv("RERANK_CITATION_WEIGHT", "0.2"))
+RERANK_VECTOR_CACHE_ENTRIES = int(os.getenv("RERANK_VECTOR_CACHE_ENTRIES", "50000"))
+
+# Near-duplicate detection: papers sharing an external ID (DOI, ArXiv, ...), or with MinHash
+# title similarity and author-surname overlap above these thresholds, are merged into one record
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUPE_TITLE_THRESHOLD = float(os.getenv("DEDUPE_TITLE_THRESHOLD", "0.8"))
+DEDUPE_AUTHOR_THRESHOLD = float(os.getenv("DEDUPE_AUTHOR_THRESHOLD", "0.5"))
+
+# BibTeX entries returned by the upstream bibtex endpoint are cached on disk
+BIBTEX_CACHE_TTL = int(os.getenv("BIBTEX_CACHE_TTL", str(30 * 24 * 60 * 60)))
+BIBTEX_CACHE_MAX_ENTRIES = int(os.getenv("BIBTEX_CACHE_MAX_ENTRIES", "50000"))
+
+# Bulk .bib export: concurrent BibTeX lookups, and most paper IDs one /export_bib request may post
+BIB_EXPORT_MAX_WORKERS = int(os.getenv("BIB_EXPORT_MAX_WORKERS", "16"))
+BIB_EXPORT_MAX_IDS = int(os.getenv("BIB_EXPORT_MAX_IDS", "500"))
+
+# Literature review: themes the selected papers are grouped into (by title similarity), and
+# concurrent reference lookups / section generations
+REVIEW_MAX_THEMES = int(os.getenv("REVIEW_MAX_THEMES", "4"))
+REVIEW_THEME_SIMILARITY = float(os.getenv("REVIEW_THEME_SIMILARITY", "0.1"))
+REVIEW_MAX_WORKERS = int(os.getenv("REVIEW_MAX_WORKERS", "16"))
@@ -1,25 +1,95 @@
+import os
+import tempfile
+
 import gradio as gr
 import requests
-import os
-import fitz  # PyMuPDF for PDFs
-import docx
 
-from api.citations import get_citations  # Import our get_citations function
-from api.bibtex import get_bibtex  # Import the get_bibtex function
-from api.compare import compare_papers
-from api.summarizer import summarize_papers
+from api.citations import get_citations_batch, fetch_more_citations_fragment, prefetch_citation_page, format_citations_box, FIRST_PAGE_SIZE
+from api.citation_graph import explore_citation_graph, format_graph_html
+from api.concurrency import fan_out
+from api.bibtex import get_bibtex_batch
+from api.bib_export import write_bib_file
+from api.compare import compare_papers, stream_compare_papers
+from api.summarizer import summarize_papers, stream_summarize_papers, stream_summarize_papers_per_paper
 from api.literature_review import generate_literature_review
 from api.keyword_extraction import extract_main_keyword
+from api.prefetch import prefetch_paper_details, warm_paper_details
+from api.intents import handle_intents, format_papers_markdown, format_search_response
+from api.paper_index import search_local_papers
+from api.dedupe import PaperDeduplicator
+from api.document_ingestion import ingest_document, UnsupportedFormatError
+from config import PAPER_DETAILS_MODE, SUMMARY_MODE, GRADIO_CONCURRENCY_LIMIT, GRADIO_QUEUE_MAX_SIZE, SEARCH_TRANSPORT, CHATBOT_URL, SEARCH_PAGE_SIZE, CITATION_PAGE_SIZE, BATCH_MAX_WORKERS, LOCAL_PREVIEW_RESULTS, DEDUPE_ENABLED
+
+class SearchSession:
+    """
+    Search result data for one browser session. Each session gets its own instance
+    through gr.State, so concurrent users never see or overwrite each other's results.
+    """
 
-# Global variables to store search result data.
-paper_ids = []             # List of paper IDs.
-paper_title_map = {}       # Mapping: paper_id -> paper title.
-
-result_titles_list = []       # List of paper titles to show in checkboxes
-paper_id_by_title = {}        # Map from title → paper ID (for reverse lookup)
+    def __init__(self):
+        self.paper_ids = []             # List of paper IDs.
+        self.paper_title_map = {}       # Mapping: paper_id -> paper title.
+
+        self.result_titles_list = []    # List of paper titles to show in checkboxes
+        self.paper_id_by_title = {}     # Map from title → paper ID (for reverse lookup)
+
+        self.paper_citations = {}       # paper_id → citations HTML
+        self.paper_bibtex = {}          # paper_id → bibtex HTML
+        self.paper_records = []         # Paper dicts from the latest search (used by the BibTeX builder)
+
+        self.keyword = ""               # Search phrase of the latest search (for "Load more")
+        self.query_text = ""            # The user's original query, used to re-rank results
+        self.results_markdown = ""      # Markdown shown for all result pages loaded so far
+        self.next_offset = 0            # Offset of the next result page
+        self.has_more = False           # Whether the last page was full
+
+        self.citation_next_offset = {}  # paper_id → offset of the next citation page (None when exhausted)
+        self.deduplicator = PaperDeduplicator()  # Merges repeats of the same work across result pages
+        self.bib_export_path = None     # Temp file reused by every .bib export of this session
+
+    def reset_results(self):
+        """Clears the current result list. Cached citations/BibTeX are kept for reuse."""
+        self.paper_ids = []
+        self.paper_title_map = {}
+        self.result_titles_list = []
+        self.paper_id_by_title = {}
+        self.paper_records = []
+        self.keyword = ""
+        self.query_text = ""
+        self.results_markdown = ""
+        self.next_offset = 0
+        self.has_more = False
+        self.deduplicator = PaperDeduplicator()
+
+    def add_papers(self, papers):
+        """
+        Appends a page of paper dicts. Papers already listed, including other versions of
+        the same work (same DOI/ArXiv ID, or near-identical title and authors), are merged
+        into the existing record instead of getting their own entry and detail fetches.
 
-paper_citations = {}  # paper_id → citations HTML
-paper_bibtex = {}     # paper_id → bibtex HTML
+        :return: The papers that were actually added, in order.
+        """
+        added = []
+        for paper in papers:
+            if isinstance(paper, dict):
+                if DEDUPE_ENABLED:
+                    pid, is_duplicate = self.deduplicator.add(paper)
+                    if is_duplicate:
+                        continue
+                    paper = self.deduplicator.records[pid]
+                pid = str(paper.get("id", "N/A"))
+                if pid in self.paper_title_map:
+                    continue
+                title = paper.get("title", "Unknown Title")
+                self.paper_ids.append(pid)
+                self.paper_title_map[pid] = title
+                self.paper_id_by_title[title] = pid
+                self.paper_records.append(paper)
+                added.append(paper)
+        return added
+
+    def selected_ids(self, selected_titles):
+        return [self.paper_id_by_title[title] for title in selected_titles]
 
 def validate_selection(selected_titles, min_required):
     if not selected_titles or len(selected_titles) < min_required:
@@ -28,40 +98,46 @@ def validate_selection(selected_titles, min_required):
 
 def extract_text_from_file(file_path):
     """
-    Extracts text from a given file (.txt, .docx, .pdf).
+    Extracts the salient text (title, abstract, headings) from a given file (.txt, .docx, .pdf).
+
+    :return: (text, error_message); exactly one of them is set.
     """
-    file_extension = os.path.splitext(file_path)[1].lower()
-    
     try:
-        if file_extension == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        
-        elif file_extension == ".docx":
-            doc = docx.Document(file_path)
-            return "\n".join([para.text for para in doc.paragraphs])
-        
-        elif file_extension == ".pdf":
-            pdf_document = fitz.open(file_path)
-            text = "\n".join([page.get_text() for page in pdf_document])
-            return text if text else "No extractable text found in the PDF."
-        
-        else:
-            return "Unsupported file format."
-    
+        text = ingest_document(file_path)
+        if not text and file_path.lower().endswith(".pdf"):
+            return None, "No extractable text found in the PDF."
+        return text, None
+
+    except UnsupportedFormatError:
+        return None, "Unsupported file format."
     except Exception as e:
-        return f"Error extracting text: {str(e)}"
+        return None, f"Error extracting text: {str(e)}"
 
-def search_and_update(query, file):
+def run_search(keyword, offset=0, query_text=None):
+    """
+    Runs a search for the extracted keyword and returns (response_data, error_message).
+    `offset` selects a later page of results, and `query_text` (the user's original query)
+    is used to re-rank them.
+    By default the intent layer is called in-process; with SEARCH_TRANSPORT="http" the
+    keyword is posted to the backend's /chatbot endpoint instead.
+    """
+    if SEARCH_TRANSPORT != "http":
+        return handle_intents(keyword, offset, query_text), None
+
+    headers = {"Content-Type": "application/json"}
+    data = {"message": keyword, "offset": offset, "query": query_text}  # Search the extracted keyword, re-rank against the full query
+    response = requests.post(CHATBOT_URL, json=data, headers=headers)
+    if response.status_code != 200:
+        return None, f"Error: {response.status_code}"
+    return response.json(), None
+
+def search_and_update(query, file, session):
     """
     Extracts the main topic keyword from the query (or uploaded file content),
     then passes the extracted keyword to the paper search API.
+    Results are stored on the caller's SearchSession.
     """
-    global paper_ids, paper_title_map, result_titles_list, paper_id_by_title
-    paper_ids = []
-    paper_title_map = {}
-    result_titles_list = []
-    paper_id_by_title = {}
+    session.reset_results()
 
     #Adding loading animation
     loading_spinner_html = """
@@ -73,17 +149,19 @@ def search_and_update(query, file):
     yield (
         gr.update(value=loading_spinner_html, visible=True),
         gr.update(visible=False),
-        gr.update(choices=[], value=[], visible=False)
+        gr.update(choices=[], value=[], visible=False),
+        session
     )
 
     # If a file is uploaded, extract its content and append it to the query
     if file is not None:
-        file_text = extract_text_from_file(file.name)
-        if "Error" in file_text:
+        file_text, file_error = extract_text_from_file(file.name)
+        if file_error:
             yield (
                 gr.update(visible=False),
-                gr.update(value=file_text, visible=True),
-                gr.update(choices=[], value=[], visible=False)
+                gr.update(value=file_error, visible=True),
+                gr.update(choices=[], value=[], visible=False),
+                session
             )
             return
         
@@ -93,55 +171,126 @@ def search_and_update(query, file):
     keyword = extract_main_keyword(query)
     print(f"Extracted Keyword: {keyword}")  # Debugging log
 
-    url = "http://127.0.0.1:5000/chatbot"
-    headers = {"Content-Type": "application/json"}
-    data = {"message": keyword}  # Send extracted keyword instead of full query
+    # Papers from earlier searches are found locally in milliseconds; show them while upstream loads
+    local_papers = search_local_papers(keyword, LOCAL_PREVIEW_RESULTS)
+    if local_papers:
+        yield (
+            gr.update(value=loading_spinner_html, visible=True),
+            gr.update(value="**From papers you have searched before:**\n\n" + format_papers_markdown(local_papers), visible=True),
+            gr.update(choices=[], value=[], visible=False),
+            session
+        )
 
     try:
-        response = requests.post(url, json=data, headers=headers)
-        if response.status_code == 200:
-            response_data = response.json()
-            markdown_text = response_data.get("response", "No response received")
-            papers = response_data.get("papers", [])
-
-            # Build global paper_ids and mapping from id to title.
-            for paper in papers:
-                if isinstance(paper, dict):
-                    pid = str(paper.get("id", "N/A"))
-
-                    # preload citations and bibtex
-                    paper_citations[pid] = get_citations([pid], paper_title_map)
-                    paper_bibtex[pid] = get_bibtex([pid], paper_title_map, papers)
-
-                    title = paper.get("title", "Unknown Title")
-                    paper_ids.append(pid)
-                    paper_title_map[pid] = title
-
-                    result_titles_list.append(title)
-                    paper_id_by_title[title] = pid
-
-                    yield (
-                        gr.update(visible=False),
-                        gr.update(value=markdown_text, visible=True),
-                        gr.update(choices=result_titles_list, value=result_titles_list[:1], visible=True)
-                    )
-                else:
-                    yield (
-                        gr.update(visible=False),
-                        gr.update(value=f"Error: {response.status_code}", visible=True)
-                    )
+        response_data, error_message = run_search(keyword, query_text=query)
+        if error_message:
+            yield (
+                gr.update(visible=False),
+                gr.update(value=error_message, visible=True),
+                gr.update(choices=[], value=[], visible=False),
+                session
+            )
+            return
+
+        markdown_text = response_data.get("response", "No response received")
+        papers = response_data.get("papers", [])
+        if not isinstance(papers, list):
+            papers = []
+
+        # Build the session's paper_ids and mapping from id to title.
+        added = session.add_papers(papers)
+        if added and len(added) < len(papers):
+            # Merged duplicates must not appear in the list when they have no checkbox
+            markdown_text = format_search_response(added)["response"]
+        session.keyword = keyword
+        session.query_text = query
+        session.results_markdown = markdown_text
+        session.next_offset = len(papers)
+        session.has_more = len(papers) >= SEARCH_PAGE_SIZE
+
+        if not session.paper_ids:
+            yield (
+                gr.update(visible=False),
+                gr.update(value=markdown_text, visible=True),
+                gr.update(choices=[], value=[], visible=False),
+                session
+            )
+            return
+
+        if PAPER_DETAILS_MODE != "eager":
+            # Show the results right away; details are fetched on demand, top papers warmed in the background
+            session.result_titles_list = [session.paper_title_map[p] for p in session.paper_ids]
+            yield (
+                gr.update(visible=False),
+                gr.update(value=markdown_text, visible=True),
+                gr.update(choices=session.result_titles_list, value=session.result_titles_list[:1], visible=True),
+                session
+            )
+            warm_paper_details(session.paper_ids, session.paper_title_map, session.paper_records, session.paper_citations, session.paper_bibtex)
+            return
+
+        # Preload citations and bibtex concurrently, showing each paper once its lookups finish
+        ready_ids = set()
+        for pid, citations_html, bibtex_html in prefetch_paper_details(session.paper_ids, session.paper_title_map, session.paper_records):
+            session.paper_citations[pid] = citations_html
+            session.paper_bibtex[pid] = bibtex_html
+            ready_ids.add(pid)
+
+            # Keep the upstream ranking among the papers that are ready so far
+            session.result_titles_list = [session.paper_title_map[p] for p in session.paper_ids if p in ready_ids]
+
+            yield (
+                gr.update(visible=False),
+                gr.update(value=markdown_text, visible=True),
+                gr.update(choices=session.result_titles_list, value=session.result_titles_list[:1], visible=True),
+                session
+            )
     except Exception as e:
         yield (
             gr.update(visible=False),
             gr.update(value=f"Request failed: {str(e)}", visible=True),
-            gr.update(choices=[], value=[], visible=False)
+            gr.update(choices=[], value=[], visible=False),
+            session
         )
 
+def load_more_results(selected_titles, session):
+    """
+    Fetches the next page of results for the session's latest search and appends
+    it to the results list and the checkboxes, keeping the current selection.
+    """
+    if not session.keyword or not session.has_more:
+        return gr.update(), gr.update(), session, gr.update(visible=False)
+
+    try:
+        response_data, error_message = run_search(session.keyword, session.next_offset, session.query_text)
+    except Exception as e:
+        response_data, error_message = None, str(e)
+
+    papers = (response_data or {}).get("papers", [])
+    if error_message or not isinstance(papers, list) or not papers:
+        session.has_more = False
+        return gr.update(), gr.update(), session, gr.update(visible=False)
+
+    start = len(session.paper_ids) + 1
+    added = session.add_papers(papers)
+    # List only the papers that got an entry (merged duplicates are left out), numbered on from the last page
+    session.results_markdown += format_papers_markdown(added, start)
+    session.next_offset += len(papers)
+    session.has_more = len(papers) >= SEARCH_PAGE_SIZE
+    session.result_titles_list = [session.paper_title_map[p] for p in session.paper_ids]
+
+    return (
+        gr.update(value=session.results_markdown, visible=True),
+        gr.update(choices=session.result_titles_list, value=selected_titles or [], visible=True),
+        session,
+        gr.update(visible=session.has_more)
+    )
+
 # For now, we leave other action functions as placeholders.
 def action_placeholder():
     return "Other actions not implemented yet."
 
-def handle_get_citations(selected_titles, visible_tabs_value):
+def handle_get_citations(selected_titles, visible_tabs_value, session):
 
     if "Citations" not in visible_tabs_value:
         visible_tabs_value.append("Citations")
@@ -161,7 +310,7 @@ def handle_get_citations(selected_titles, visible_tabs_value):
     )
 
     # Retrieve citation content
-    result = on_get_citations(selected_titles)
+    result = on_get_citations(selected_titles, session)
     content = result["value"]
 
     # Update states and display content
@@ -177,7 +326,7 @@ def handle_get_citations(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-def handle_summarize(selected_titles, visible_tabs_value):
+def handle_summarize(selected_titles, visible_tabs_value, session):
 
     if "Summary" not in visible_tabs_value:
         visible_tabs_value.append("Summary")
@@ -197,7 +346,7 @@ def handle_summarize(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-    result = on_summarize(selected_titles)
+    result = on_summarize(selected_titles, session)
     content = result["value"]
 
     yield (
@@ -213,7 +362,7 @@ def handle_summarize(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-def handle_bibtex(selected_titles, visible_tabs_value):
+def handle_bibtex(selected_titles, visible_tabs_value, session):
 
     if "BibTeX" not in visible_tabs_value:
         visible_tabs_value.append("BibTeX")
@@ -233,7 +382,7 @@ def handle_bibtex(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-    result = on_bibtex(selected_titles)
+    result = on_bibtex(selected_titles, session)
     content = result["value"]
 
     yield (
@@ -249,7 +398,7 @@ def handle_bibtex(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-def handle_compare(selected_titles, visible_tabs_value):
+def handle_compare(selected_titles, visible_tabs_value, session):
 
     if "Compare" not in visible_tabs_value:
         visible_tabs_value.append("Compare")
@@ -269,7 +418,7 @@ def handle_compare(selected_titles, visible_tabs_value):
         gr.update(value=visible_tabs_value)
     )
 
-    result = on_compare(selected_titles)
+    result = on_compare(selected_titles, session)
     content = result["value"]
 
     yield (
@@ -303,12 +452,14 @@ def render_tabs(active, available_tabs):
     buttons += '</div>'
     return buttons
 
-def switch_tab(tab_name, c, s, b, cmp, vis_tabs):
+def switch_tab(tab_name, c, s, b, cmp, rev, graph, vis_tabs):
     content = {
         "Citations": c,
         "Summary": s,
         "BibTeX": b,
-        "Compare": cmp
+        "Compare": cmp,
+        "Review": rev,
+        "Graph": graph
     }.get(tab_name, "")
     print(f"[SWITCH] Tab: {tab_name} | Content preview: {content[:100]}")
     return vis_tabs, content, tab_name
@@ -790,8 +941,11 @@ with gr.Blocks(css="""
     state_summary = gr.State("")
     state_bibtex = gr.State("")
     state_compare = gr.State("")
+    state_review = gr.State("")
+    state_graph = gr.State("")
     active_tab = gr.State("")
     visible_tabs = gr.State([])
+    session_state = gr.State(SearchSession)  # Called once per browser session
 
     tab_tracker = gr.Textbox(visible=False, elem_id="__tab_state__")
 
@@ -887,12 +1041,18 @@ with gr.Blocks(css="""
             results_md = gr.Markdown(visible=False, elem_id="results-box")
 
             selection = gr.CheckboxGroup(label="Select papers from above that you want to work with", choices=[], visible=False, elem_id="paper-checkboxes")
+            load_more_btn = gr.Button("Load More Results", visible=False, elem_classes="action-btn")
             
             with gr.Row(elem_id="action-btn-row"):
                 btn_citations = gr.Button("Get Citations", elem_classes="action-btn")
                 btn_summary = gr.Button("Explain Papers", elem_classes="action-btn")
                 btn_bibtex = gr.Button("Get BibTeX Reference", elem_classes="action-btn")
                 btn_compare = gr.Button("Compare Papers", elem_classes="action-btn")
+                btn_review = gr.Button("Literature Review", elem_classes="action-btn")
+            btn_more_citations = gr.Button("Load More Citations", visible=False, elem_classes="action-btn")
+            btn_graph = gr.Button("Explore Citation Graph", elem_classes="action-btn")
+            btn_export_bib = gr.Button("Export .bib", elem_classes="action-btn")
+            export_bib_file = gr.File(label="Bibliography", visible=False)
 
     
     gr.HTML("<div id='action-output-anchor'></div>")
@@ -906,7 +1066,7 @@ with gr.Blocks(css="""
         with gr.Column(elem_id="tab-bar-container", scale=1, min_width=0, elem_classes="tab-row-container"):       
             switch_tabs_text = gr.HTML("<span style='color:#e2e8f0; background-color:#151C3C; padding: 5px 10px; border-radius: 8px; margin-right: 10px;'>Switch Tabs from here:</span>")
             tab_selector = gr.Radio(
-                choices=["Summary", "Citations", "BibTeX", "Compare"],
+                choices=["Summary", "Citations", "BibTeX", "Compare", "Review", "Graph"],
                 value="Summary",
                 interactive=True,
                 elem_id="tab-bar",
@@ -917,120 +1077,265 @@ with gr.Blocks(css="""
 
     tab_selector.change(
     fn=switch_tab,
-    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
     tab_tracker.change(
     switch_tab,
-    inputs=[tab_tracker, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_tracker, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
     # Wire up the search button.
     search_button.click(
         search_and_update,
-        inputs=[query_input, upload_file],
-        outputs=[loading_html, results_md, selection]
+        inputs=[query_input, upload_file, session_state],
+        outputs=[loading_html, results_md, selection, session_state]
+    ).then(
+        fn=lambda session: gr.update(visible=session.has_more),
+        inputs=[session_state],
+        outputs=[load_more_btn]
     )
 
-    def on_get_citations(selected_titles):
+    load_more_btn.click(
+        load_more_results,
+        inputs=[selection, session_state],
+        outputs=[results_md, selection, session_state, load_more_btn]
+    )
+
+    def on_get_citations(selected_titles, session):
         valid, msg = validate_selection(selected_titles, 1)
         if not valid:
             return msg
 
-        selected_ids = [paper_id_by_title[title] for title in selected_titles]
-        html_output = "".join([paper_citations.get(pid, "❌ No citations cached.") for pid in selected_ids])
+        selected_ids = session.selected_ids(selected_titles)
+        missing_ids = [pid for pid in selected_ids if pid not in session.paper_citations]
+        if missing_ids:
+            # setdefault: the background warmer may have stored a paper while this batch ran
+            for pid, html in get_citations_batch(missing_ids, session.paper_title_map).items():
+                session.paper_citations.setdefault(pid, html)
+        html_output = "".join([session.paper_citations.get(pid, "❌ No citations cached.") for pid in selected_ids])
+
+        # The first page is on screen again; prefetch the next one while the user reads it
+        for pid in selected_ids:
+            session.citation_next_offset[pid] = FIRST_PAGE_SIZE
+            prefetch_citation_page(pid, FIRST_PAGE_SIZE, CITATION_PAGE_SIZE)
         return html_output
     
     
-    def handle_citations_click(selected_titles):
-        html = on_get_citations(selected_titles)  # <- returns plain HTML string
+    def handle_citations_click(selected_titles, session):
+        html = on_get_citations(selected_titles, session)  # <- returns plain HTML string
         print(f"[DEBUG] Citations Output: {html[:100]}")
-        return html, "Citations"
+        return html, "Citations", session, gr.update(visible=bool(selected_titles))
 
     btn_citations.click(
         fn=handle_citations_click,
-        inputs=[selection],
-        outputs=[state_citations, tab_selector]
+        inputs=[selection, session_state],
+        outputs=[state_citations, tab_selector, session_state, btn_more_citations]
     ).then(
     fn=switch_tab,
-    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
+    def load_more_citations(selected_titles, current_html, session):
+        """Appends the next citation page of every selected paper to the Citations tab."""
+        valid, msg = validate_selection(selected_titles, 1)
+        if not valid:
+            return current_html, "Citations", current_html, session, gr.update(visible=False)
+
+        selected_ids = [pid for pid in session.selected_ids(selected_titles)
+                        if session.citation_next_offset.get(pid, FIRST_PAGE_SIZE) is not None]
+
+        def fetch_next(pid):
+            offset = session.citation_next_offset.get(pid, FIRST_PAGE_SIZE)
+            return fetch_more_citations_fragment(pid, session.paper_title_map.get(pid, pid), offset)
+
+        pages = fan_out(fetch_next, selected_ids, BATCH_MAX_WORKERS)
+        fragments = []
+        for pid in selected_ids:
+            fragment, next_offset = pages[pid]
+            session.citation_next_offset[pid] = next_offset
+            if fragment:
+                fragments.append(fragment)
+
+        html = current_html + (format_citations_box("".join(fragments)) if fragments else "")
+        has_more = any(session.citation_next_offset.get(pid) is not None for pid in selected_ids)
+        return html, "Citations", html, session, gr.update(visible=has_more)
+
+    btn_more_citations.click(
+        fn=load_more_citations,
+        inputs=[selection, state_citations, session_state],
+        outputs=[state_citations, tab_selector, tab_output, session_state, btn_more_citations]
+    )
+
+    def handle_graph_click(selected_titles, session):
+        """Crawls the citation graph around the selected papers and shows its most central papers."""
+        valid, msg = validate_selection(selected_titles, 1)
+        if not valid:
+            return msg, "Graph", msg, "Graph"
+
+        selected_ids = session.selected_ids(selected_titles)
+        central = explore_citation_graph(selected_ids, session.paper_title_map)
+        html = format_graph_html(central, selected_titles)
+        return html, "Graph", html, "Graph"
+
+    btn_graph.click(
+        fn=handle_graph_click,
+        inputs=[selection, session_state],
+        outputs=[state_graph, tab_selector, tab_output, active_tab]
+    ).then(
+    fn=switch_tab,
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
+    outputs=[tabs_html, tab_output, active_tab]
+    )
+
+    def handle_export_bib(selected_titles, session):
+        """Writes a .bib file for the selected papers (or every result when none are selected)."""
+        paper_ids = session.selected_ids(selected_titles) if selected_titles else list(session.paper_ids)
+        if not paper_ids:
+            return gr.update(value=None, visible=False), session
+        # One file per session, overwritten by each export, so exports do not pile up in the temp dir
+        if session.bib_export_path is None:
+            fd, session.bib_export_path = tempfile.mkstemp(suffix=".bib", prefix="delvedeep-")
+            os.close(fd)
+        with open(session.bib_export_path, "w", encoding="utf-8") as out:
+            write_bib_file(paper_ids, out, session.paper_records)
+        return gr.update(value=session.bib_export_path, visible=True), session
+
+    btn_export_bib.click(
+        fn=handle_export_bib,
+        inputs=[selection, session_state],
+        outputs=[export_bib_file, session_state]
+    )
+
     # ✅ Now add Summarize here:
-    def on_summarize(selected_titles):
+    def on_summarize(selected_titles, session):
         valid, msg = validate_selection(selected_titles, 1)
         if not valid:
             return msg
 
-        selected_ids = [paper_id_by_title[title] for title in selected_titles]
-        result_html = summarize_papers(selected_ids, paper_title_map)
+        selected_ids = session.selected_ids(selected_titles)
+        result_html = summarize_papers(selected_ids, session.paper_title_map)
         return result_html
 
-    def handle_summary_click(selected_titles):
-        html = on_summarize(selected_titles)  # <- returns plain HTML string
+    def stream_summarize(selected_titles, session):
+        valid, msg = validate_selection(selected_titles, 1)
+        if not valid:
+            yield msg
+            return
+
+        selected_ids = session.selected_ids(selected_titles)
+        if SUMMARY_MODE == "per_paper":
+            yield from stream_summarize_papers_per_paper(selected_ids, session.paper_title_map)
+        else:
+            yield from stream_summarize_papers(selected_ids, session.paper_title_map)
+
+    def handle_summary_click(selected_titles, session):
+        # Stream tokens straight into the output so the tab fills in as the model writes
+        html = ""
+        for html in stream_summarize(selected_titles, session):
+            yield html, "Summary", html, "Summary"
         print(f"[DEBUG] Summary Output: {html[:100]}")
-        return html, "Summary"
 
     btn_summary.click(
         fn=handle_summary_click,
-        inputs=[selection],
-        outputs=[state_summary, tab_selector]
+        inputs=[selection, session_state],
+        outputs=[state_summary, tab_selector, tab_output, active_tab]
     ).then(
     fn=switch_tab,
-    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
     # ... btn_summary logic
 
-    def on_bibtex(selected_titles):
+    def on_bibtex(selected_titles, session):
         valid, msg = validate_selection(selected_titles, 1)
         if not valid:
             return msg
 
-        selected_ids = [paper_id_by_title[title] for title in selected_titles]
-        html_output = "".join([paper_bibtex.get(pid, "❌ No BibTeX cached.") for pid in selected_ids])
+        selected_ids = session.selected_ids(selected_titles)
+        missing_ids = [pid for pid in selected_ids if pid not in session.paper_bibtex]
+        if missing_ids:
+            for pid, html in get_bibtex_batch(missing_ids, session.paper_title_map, session.paper_records).items():
+                session.paper_bibtex.setdefault(pid, html)
+        html_output = "".join([session.paper_bibtex.get(pid, "❌ No BibTeX cached.") for pid in selected_ids])
         return html_output
     
-    def handle_bibtex_click(selected_titles):
-        html = on_bibtex(selected_titles)  # <- returns plain HTML string
+    def handle_bibtex_click(selected_titles, session):
+        html = on_bibtex(selected_titles, session)  # <- returns plain HTML string
         print(f"[DEBUG] BibTeX Output: {html[:100]}")
-        return html, "BibTeX"
+        return html, "BibTeX", session
 
     btn_bibtex.click(
         fn=handle_bibtex_click,
-        inputs=[selection],
-        outputs=[state_bibtex, tab_selector]
+        inputs=[selection, session_state],
+        outputs=[state_bibtex, tab_selector, session_state]
     ).then(
     fn=switch_tab,
-    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
-    def on_compare(selected_titles):
+    def on_compare(selected_titles, session):
         valid, msg = validate_selection(selected_titles, 2)
         if not valid:
             return msg
 
-        selected_ids = [paper_id_by_title[title] for title in selected_titles]
-        result_html = compare_papers(selected_ids, paper_title_map)
+        selected_ids = session.selected_ids(selected_titles)
+        result_html = compare_papers(selected_ids, session.paper_title_map)
         return result_html
     
-    def handle_compare_click(selected_titles):
-        html = on_compare(selected_titles)  # <- returns plain HTML string
+    def stream_compare(selected_titles, session):
+        valid, msg = validate_selection(selected_titles, 2)
+        if not valid:
+            yield msg
+            return
+
+        selected_ids = session.selected_ids(selected_titles)
+        yield from stream_compare_papers(selected_ids, session.paper_title_map)
+
+    def handle_compare_click(selected_titles, session):
+        # Stream tokens straight into the output so the tab fills in as the model writes
+        html = ""
+        for html in stream_compare(selected_titles, session):
+            yield html, "Compare", html, "Compare"
         print(f"[DEBUG] Compare Output: {html[:100]}")
-        return html, "Compare"
 
     btn_compare.click(
         fn=handle_compare_click,
-        inputs=[selection],
-        outputs=[state_compare, tab_selector]
+        inputs=[selection, session_state],
+        outputs=[state_compare, tab_selector, tab_output, active_tab]
+    ).then(
+    fn=switch_tab,
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
+    outputs=[tabs_html, tab_output, active_tab]
+    )
+
+    def handle_review_click(selected_titles, session):
+        valid, msg = validate_selection(selected_titles, 1)
+        if not valid:
+            yield msg, "Review", msg, "Review"
+            return
+
+        loading = "<div class='loader'></div><div id='loading-text'>Writing your literature review...</div>"
+        yield loading, "Review", loading, "Review"
+
+        selected_ids = session.selected_ids(selected_titles)
+        paper_metadata = {str(p.get("id")): p for p in session.paper_records}
+        html = generate_literature_review(selected_ids, paper_metadata)
+        print(f"[DEBUG] Review Output: {html[:100]}")
+        yield html, "Review", html, "Review"
+
+    btn_review.click(
+        fn=handle_review_click,
+        inputs=[selection, session_state],
+        outputs=[state_review, tab_selector, tab_output, active_tab]
     ).then(
     fn=switch_tab,
-    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, visible_tabs],
+    inputs=[tab_selector, state_citations, state_summary, state_bibtex, state_compare, state_review, state_graph, visible_tabs],
     outputs=[tabs_html, tab_output, active_tab]
     )
 
@@ -1043,8 +1348,15 @@ with gr.Blocks(css="""
             return "<h3>🔖 BibTeX Reference Output Appears Here</h3>"
         elif selected_tab == "Compare":
             return "<h3>📊 Comparison Output Appears Here</h3>"
+        elif selected_tab == "Review":
+            return "<h3>📖 Literature Review Output Appears Here</h3>"
+        elif selected_tab == "Graph":
+            return "<h3>🕸️ Citation Graph Output Appears Here</h3>"
         else:
             return "<p>Select a tab to view content.</p>"
     
 
-demo.launch(share=True)
+if __name__ == "__main__":
+    # Queue requests so many users can be served from one process without overloading upstream
+    demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT, max_size=GRADIO_QUEUE_MAX_SIZE)
+    demo.launch(share=True)
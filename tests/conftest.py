@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Import the app modules from the repository root, and keep their on-disk caches out of it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DELVEDEEP_CACHE_DIR", tempfile.mkdtemp(prefix="delvedeep-test-cache-"))
+
+class FakeClock:
+    """Stands in for time.time() and time.sleep(); sleeping only moves the clock forward."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Returns a function that points a module's time.time/time.sleep at a new FakeClock and returns it."""
+    def patch(module):
+        clock = FakeClock()
+        monkeypatch.setattr(module.time, "time", clock)
+        monkeypatch.setattr(module.time, "sleep", clock.sleep)
+        return clock
+    return patch
@@ -0,0 +1,70 @@
+import pytest
+
+import api.bib_export as bib_export
+import api.bibtex as bibtex
+from api.disk_cache import DiskCache
+from api.paper_index import index_papers
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """Records the IDs sent to the bibtex endpoint and answers with an entry for each."""
+    requested = []
+
+    def fake_upstream_get(endpoint, params=None, timeout=None):
+        requested.append(params["id"])
+        key = params["id"].replace(":", "")
+        return FakeResponse({"papers": [{"bibtex": f"@article{{smith2020,\n  title = {{{key}}}\n}}"}]})
+
+    monkeypatch.setattr(bibtex, "upstream_get", fake_upstream_get)
+    monkeypatch.setattr(bibtex, "_bibtex_cache", DiskCache(str(tmp_path / "bibtex.sqlite3")))
+    return requested
+
+def test_export_without_papers_resolves_corpus_ids_from_the_index(upstream):
+    index_papers([{
+        "id": "0f3a9c",
+        "title": "Indexed Paper",
+        "authors": ["Jane Smith"],
+        "citations": 3,
+        "pdf": "No PDF available",
+        "external_ids": {"CorpusId": 12345},
+    }]).result()
+
+    chunks = list(bib_export.iter_bib_entries(["0f3a9c", "7be21d", "98765"], max_workers=2))
+
+    # Known papers are looked up by their real CorpusId, unknown ones by paperId,
+    # and numeric IDs are already CorpusIds
+    assert sorted(upstream) == sorted(["CorpusId:12345", "7be21d", "CorpusId:98765"])
+    assert chunks[-1] == "% Exported 3 entries (0 unresolved)\n"
+
+def test_export_renames_repeated_citation_keys(upstream):
+    text = "".join(bib_export.iter_bib_entries(["aa11", "bb22", "cc33"], max_workers=1))
+
+    assert text.count("@article{smith2020,") == 1
+    assert "@article{smith2020a," in text
+    assert "@article{smith2020b," in text
+
+def test_unresolved_papers_become_comments(monkeypatch):
+    def failing_fetch(pid, papers, use_gpt_fallback):
+        return f"❌ Error retrieving BibTeX for paper {pid}: boom"
+
+    monkeypatch.setattr(bib_export, "fetch_bibtex_text", failing_fetch)
+    chunks = list(bib_export.iter_bib_entries(["x1"], papers=[{"id": "x1"}]))
+
+    assert chunks[0].startswith("% Could not resolve BibTeX for x1:")
+    assert chunks[-1] == "% Exported 0 entries (1 unresolved)\n"
+
+def test_citation_key_deduper_suffixes():
+    deduper = bib_export.CitationKeyDeduper()
+    entries = [deduper.unique_entry("@misc{key,\n}") for _ in range(28)]
+
+    assert entries[0] == "@misc{key,\n}"
+    assert entries[1] == "@misc{keya,\n}"
+    assert entries[26] == "@misc{keyz,\n}"
+    assert entries[27] == "@misc{keyaa,\n}"
@@ -0,0 +1,42 @@
+import pytest
+
+import api.bibtex as bibtex
+from api.disk_cache import DiskCache
+
+PAPER = {"id": "0f3a9c", "title": "Deep Learning", "authors": ["Yann LeCun"], "year": 2015,
+         "external_ids": {"CorpusId": 12345}}
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+@pytest.fixture
+def answer_with(monkeypatch, tmp_path):
+    """Makes the bibtex endpoint answer every request with the given payload."""
+    monkeypatch.setattr(bibtex, "_bibtex_cache", DiskCache(str(tmp_path / "bibtex.sqlite3")))
+
+    def answer(payload):
+        monkeypatch.setattr(bibtex, "upstream_get", lambda endpoint, params=None, timeout=None: FakeResponse(payload))
+    return answer
+
+def test_returns_and_caches_the_endpoint_entry(answer_with):
+    answer_with({"papers": [{"bibtex": "@article{lecun2015deep,\n}"}]})
+
+    assert bibtex.fetch_bibtex_text("0f3a9c", [PAPER]) == "@article{lecun2015deep,\n}"
+    assert bibtex._bibtex_cache.get("CorpusId:12345") == "@article{lecun2015deep,\n}"
+
+@pytest.mark.parametrize("payload", [{"papers": [{"bibtex": None}]}, {"papers": [{}]}, {"papers": []}])
+def test_misses_are_built_locally(answer_with, payload):
+    answer_with(payload)
+
+    assert bibtex.fetch_bibtex_text("0f3a9c", [PAPER], use_gpt_fallback=False).startswith("@misc{lecun2015deep,")
+    assert bibtex._bibtex_cache.get("CorpusId:12345") is None
+
+def test_misses_without_metadata_report_an_error(answer_with):
+    answer_with({"papers": [{}]})
+
+    assert bibtex.fetch_bibtex_text("0f3a9c", use_gpt_fallback=False) == (
+        "❌ Error retrieving BibTeX for paper 0f3a9c: No BibTeX found.")
@@ -0,0 +1,44 @@
+from api.bibtex_builder import build_bibtex, escape_latex, make_citation_key
+
+PAPER = {
+    "id": "204e3073870fae3d05bcbc2f6a8e263d9b72e776",
+    "title": "Attention Is All You Need",
+    "authors": ["Ashish Vaswani", "Noam Shazeer"],
+    "year": 2017,
+    "pdf": "No PDF available",
+    "external_ids": {"ArXiv": "1706.03762", "CorpusId": 13756489},
+}
+
+def test_citation_key_from_surname_year_and_title_word():
+    assert make_citation_key(PAPER) == "vaswani2017attention"
+    assert make_citation_key({"title": "On the Origin of Species", "authors": ["Charles Darwin"]}) == "darwinorigin"
+
+def test_citation_key_is_ascii_and_falls_back_to_the_paper_id():
+    assert make_citation_key({"title": "Über Graphen", "authors": ["Paul Erdős"], "year": 1959}) == "erdos1959uber"
+    assert make_citation_key({"id": "ABC-123", "title": "", "authors": []}) == "anonabc123"
+
+def test_escape_latex():
+    assert escape_latex("50% of R&D_costs {x}") == r"50\% of R\&D\_costs \{x\}"
+    assert escape_latex("a\\b~c") == r"a\textbackslash{}b\textasciitilde{}c"
+
+def test_build_bibtex_entry():
+    entry = build_bibtex(PAPER)
+
+    assert entry.startswith("@misc{vaswani2017attention,\n")
+    assert "  title = {{Attention Is All You Need}}" in entry
+    assert "  author = {Ashish Vaswani and Noam Shazeer}" in entry
+    assert "  eprint = {1706.03762}" in entry
+    assert "  url = {https://arxiv.org/abs/1706.03762}" in entry
+    assert "  note = {Semantic Scholar CorpusId: 13756489}" in entry
+    assert entry.endswith("\n}")
+
+def test_build_bibtex_prefers_the_pdf_url_over_the_doi():
+    entry = build_bibtex({"title": "T", "authors": [], "pdf": "https://example.org/t.pdf", "external_ids": {"DOI": "10.1/x"}})
+
+    assert "  doi = {10.1/x}" in entry
+    assert "  url = {https://example.org/t.pdf}" in entry
+    assert "author" not in entry
+
+def test_build_bibtex_needs_a_title():
+    assert build_bibtex({"title": "Unknown Title", "authors": ["A B"]}) is None
+    assert build_bibtex({"authors": ["A B"]}) is None
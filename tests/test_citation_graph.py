@@ -0,0 +1,58 @@
+import pytest
+
+import api.citation_graph as citation_graph
+from api.citation_graph import CitationGraph, build_citation_graph, most_central_papers
+
+def small_graph():
+    """a and b both cite c, c cites d, and d cites nothing."""
+    graph = CitationGraph()
+    a, b, c, d = (graph.add_node(pid, hop=hop) for pid, hop in (("a", 1), ("b", 1), ("c", 1), ("d", 0)))
+    graph.add_edge(a, c)
+    graph.add_edge(a, c)  # Repeated edge
+    graph.add_edge(b, c)
+    graph.add_edge(c, d)
+    graph.add_edge(d, d)  # Self-loop
+    return graph
+
+def test_out_adjacency_is_sorted_and_drops_repeated_edges():
+    graph = small_graph()
+    graph.add_edge(graph.node("a"), graph.node("b"))
+    offsets, targets = graph.out_adjacency()
+
+    assert list(offsets) == [0, 2, 3, 4, 4]
+    assert list(targets) == [1, 2, 2, 3]
+    assert list(graph.in_degrees()) == [0, 1, 2, 1]
+
+def test_pagerank_flows_to_cited_papers():
+    ranks = small_graph().pagerank()
+
+    assert sum(ranks) == pytest.approx(1.0)
+    assert ranks[0] == pytest.approx(ranks[1])
+    assert ranks[3] > ranks[2] > ranks[0]
+
+def test_pagerank_of_an_empty_graph():
+    assert CitationGraph().pagerank() == []
+
+def test_most_central_papers_skips_seeds_unless_asked():
+    graph = small_graph()
+
+    assert [p["id"] for p in most_central_papers(graph)] == ["c", "a", "b"]
+    assert [p["id"] for p in most_central_papers(graph, top_k=2, include_seeds=True)] == ["d", "c"]
+    assert most_central_papers(graph)[0]["in_degree"] == 2
+
+def test_build_citation_graph_crawls_each_paper_once(monkeypatch):
+    citing = {"s": ["x", "y"], "x": ["y", "z"], "y": ["z"], "z": []}
+    looked_up = []
+
+    def fake_fetch_citation_page(paper_id, offset, limit):
+        looked_up.append(paper_id)
+        return {"citations": [{"citingPaper": {"paperId": pid, "title": pid.upper()}} for pid in citing[paper_id]]}
+
+    monkeypatch.setattr(citation_graph, "fetch_citation_page", fake_fetch_citation_page)
+    graph = build_citation_graph(["s"], hops=3, fanout=5, max_nodes=10, max_workers=2)
+
+    assert sorted(looked_up) == ["s", "x", "y", "z"]
+    assert graph.paper_ids[0] == "s"
+    assert sorted(graph.paper_ids) == ["s", "x", "y", "z"]
+    assert graph.hops[graph.node("z")] == 2
+    assert len(graph.out_adjacency()[1]) == 5  # x->s, y->s, y->x, z->x, z->y
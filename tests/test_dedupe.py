@@ -0,0 +1,67 @@
+import api.dedupe as dedupe
+from api.dedupe import PaperDeduplicator, dedupe_papers, external_id_keys, normalize_title
+
+def paper(pid, title, authors=("Jane Smith", "Wei Zhang"), citations=0, pdf="No PDF available", **external_ids):
+    return {"id": pid, "title": title, "authors": list(authors), "citations": citations, "pdf": pdf,
+            "external_ids": external_ids}
+
+def test_normalize_title():
+    assert normalize_title("  Déjà-Vu:  A Study of  RNNs! ") == "deja vu a study of rnns"
+
+def test_external_id_keys_ignore_doi_prefixes_and_arxiv_versions():
+    assert external_id_keys({"DOI": "https://doi.org/10.1/ABC", "ArXiv": "2101.00001v3", "MAG": ""}) == {
+        "doi:10.1/abc", "arxiv:2101.00001"}
+
+def test_merges_records_sharing_a_doi():
+    papers = [
+        paper("a", "Deep Learning", citations=10, DOI="10.1/x"),
+        paper("b", "Deep learning (extended version)", citations=25, pdf="https://example.org/b.pdf", DOI="doi:10.1/X"),
+    ]
+    merged = dedupe_papers(papers)
+
+    assert [p["id"] for p in merged] == ["a"]
+    assert merged[0]["citations"] == 25
+    assert merged[0]["pdf"] == "https://example.org/b.pdf"
+    assert merged[0]["duplicate_ids"] == ["b"]
+    assert papers[0].get("duplicate_ids") is None  # Inputs are not modified
+
+def test_merges_records_sharing_an_arxiv_id_across_versions():
+    merged = dedupe_papers([paper("a", "One Title", ArXiv="2101.00001v1"), paper("b", "Another Title", ArXiv="2101.00001v2")])
+
+    assert [p["id"] for p in merged] == ["a"]
+
+def test_merges_near_duplicate_titles_by_the_same_authors():
+    merged = dedupe_papers([
+        paper("a", "Attention Is All You Need", CorpusId=1),
+        paper("b", "Attention is all you need.", authors=["J. Smith", "W. Zhang"], CorpusId=2),
+    ])
+
+    assert [p["id"] for p in merged] == ["a"]
+    assert merged[0]["external_ids"] == {"CorpusId": 1}
+
+def test_keeps_similar_titles_by_different_authors():
+    merged = dedupe_papers([
+        paper("a", "Attention Is All You Need"),
+        paper("b", "Attention Is All You Need", authors=["Ana Lopez", "Omar Haddad"]),
+    ])
+
+    assert [p["id"] for p in merged] == ["a", "b"]
+
+def test_keeps_different_titles():
+    merged = dedupe_papers([paper("a", "Graph Neural Networks for Molecules"), paper("b", "Convolutional Networks for Images")])
+
+    assert [p["id"] for p in merged] == ["a", "b"]
+
+def test_deduplicator_reports_canonical_ids_incrementally():
+    deduper = PaperDeduplicator()
+
+    assert deduper.add(paper("a", "Deep Learning", DOI="10.1/x")) == ("a", False)
+    assert deduper.add(paper("b", "Deep Learning", DOI="10.1/x")) == ("a", True)
+    assert deduper.add(paper("b", "Deep Learning", DOI="10.1/x")) == ("a", True)
+    assert deduper.add(paper("a", "Deep Learning")) == ("a", True)
+
+def test_disabled_dedupe_only_drops_repeated_ids(monkeypatch):
+    monkeypatch.setattr(dedupe, "DEDUPE_ENABLED", False)
+    merged = dedupe_papers([paper("a", "T", DOI="10.1/x"), paper("b", "T", DOI="10.1/x"), paper("a", "T")])
+
+    assert [p["id"] for p in merged] == ["a", "b"]
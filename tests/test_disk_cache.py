@@ -0,0 +1,60 @@
+import pytest
+
+import api.disk_cache as disk_cache
+from api.disk_cache import DiskCache
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(disk_cache)
+
+def test_round_trips_json_values(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("k", {"papers": [1, 2], "title": "x"})
+
+    assert cache.get("k") == {"papers": [1, 2], "title": "x"}
+    assert cache.get("missing", "default") == "default"
+
+def test_entries_go_stale_after_ttl_and_expire_after_stale_window(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), ttl=10, stale_ttl=5)
+    cache.set("k", "v")
+
+    clock.now += 10
+    assert cache.get_entry("k") == ("v", False)
+
+    # Stale entries are still served by get_entry, but not by get
+    clock.now += 3
+    assert cache.get_entry("k") == ("v", True)
+    assert cache.get("k") is None
+
+    # Past the stale window the entry is deleted
+    clock.now += 3
+    assert cache.get_entry("k") is None
+    assert len(cache) == 0
+
+def test_entries_never_expire_without_ttl(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("k", "v")
+
+    clock.now += 10 ** 9
+    assert cache.get_entry("k") == ("v", False)
+
+def test_evicts_least_recently_used_entries(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")  # "a" is now more recently used than "b"
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    DiskCache(path).set("k", [1, 2, 3])
+
+    assert DiskCache(path).get("k") == [1, 2, 3]
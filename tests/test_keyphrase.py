@@ -0,0 +1,40 @@
+from api.keyphrase import expand_abbreviation, extract_local_keyphrase, rake_keyphrases
+
+def test_expands_abbreviations_and_plurals():
+    assert expand_abbreviation("NLP") == "natural language processing"
+    assert expand_abbreviation("LLMs") == "large language models"
+    assert expand_abbreviation("transformer") is None
+
+def test_ambiguous_abbreviations_only_expand_in_capitals():
+    assert expand_abbreviation("IR") == "information retrieval"
+    assert expand_abbreviation("ir") is None
+
+def test_short_query_keeps_content_words_in_order():
+    assert extract_local_keyphrase("find papers on NLP for low resource languages") == (
+        "natural language processing low resource languages", True)
+
+def test_single_word_queries_are_not_confident():
+    assert extract_local_keyphrase("transformers") == ("transformers", False)
+
+def test_negations_and_empty_text_escalate():
+    assert extract_local_keyphrase("papers about transformers but not NLP") == ("", False)
+    assert extract_local_keyphrase("   ") == ("", False)
+
+def test_rake_ranks_longer_repeated_phrases_first():
+    ranked = rake_keyphrases("Graph neural networks for molecule property prediction. Graph neural networks.")
+    phrases = [phrase for phrase, _ in ranked]
+
+    assert phrases[0] == "graph neural networks"
+    assert "molecule property prediction" in phrases
+    assert ranked == sorted(ranked, key=lambda item: item[1], reverse=True)
+
+def test_long_text_is_summarised_from_top_phrases():
+    text = (
+        "We study graph neural networks for molecule property prediction. Graph neural networks learn "
+        "from molecular graphs. Our graph neural networks outperform baselines on molecule property "
+        "prediction benchmarks, and message passing helps molecule property prediction."
+    )
+    phrase, _ = extract_local_keyphrase(text)
+
+    assert "molecule property prediction" in phrase
+    assert 5 <= len(phrase.split()) <= 8
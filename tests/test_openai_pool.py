@@ -0,0 +1,67 @@
+import pytest
+
+import api.openai_pool as openai_pool
+from api.openai_pool import OpenAIKeyPool
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(openai_pool)
+
+def make_pool(n_keys=2, rpm_limit=10, tpm_limit=1000):
+    return OpenAIKeyPool([f"sk-test-key-{i:04d}" for i in range(n_keys)], rpm_limit=rpm_limit, tpm_limit=tpm_limit)
+
+def test_requires_keys():
+    with pytest.raises(ValueError):
+        OpenAIKeyPool([])
+
+def test_calls_go_to_the_key_with_most_headroom(clock):
+    pool = make_pool()
+    first = pool._acquire(600)
+    second = pool._acquire(100)
+    third = pool._acquire(100)
+
+    assert second is not first
+    assert third is second  # 200 of 1000 tokens used beats 600
+    assert pool.stats() == {
+        first.label: {"requests_last_minute": 1, "tokens_last_minute": 600, "cooling_down": False},
+        second.label: {"requests_last_minute": 2, "tokens_last_minute": 200, "cooling_down": False},
+    }
+
+def test_headroom_is_the_tighter_of_requests_and_tokens(clock):
+    pool = make_pool(n_keys=1, rpm_limit=4, tpm_limit=1000)
+    state = pool._keys[0]
+
+    assert state.headroom(4, 1000, 100) == pytest.approx(0.75)
+    assert state.headroom(4, 1000, 900) == pytest.approx(0.1)
+
+def test_actual_usage_replaces_the_estimate(clock):
+    pool = make_pool(n_keys=1)
+    state = pool._acquire(500)
+    pool._record_usage(state, 500, 120)
+
+    assert state.token_total == 120
+
+def test_usage_leaves_the_window_after_a_minute(clock):
+    pool = make_pool(n_keys=1, rpm_limit=2)
+    state = pool._acquire(100)
+    pool._acquire(100)
+
+    # Both slots are taken, so the third call waits for the window to roll over
+    assert pool._acquire(100) is state
+    assert clock.now > 1000.0 + openai_pool.WINDOW_SECONDS
+    assert len(state.requests) == 1
+    assert state.token_total == 100
+
+def test_estimates_above_the_token_limit_are_clamped(clock):
+    pool = make_pool(n_keys=1, tpm_limit=1000)
+    state = pool._acquire(5000)
+
+    assert state.token_total == 1000
+
+def test_cooling_down_keys_are_skipped(clock):
+    pool = make_pool()
+    cooled = pool._keys[0]
+    pool._cool_down(cooled, 30)
+
+    assert pool._acquire(100) is not cooled
+    assert pool.stats()[cooled.label]["cooling_down"] is True
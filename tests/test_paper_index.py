@@ -0,0 +1,52 @@
+import sqlite3
+
+from api.paper_index import PaperIndex
+
+def paper(pid, title, authors=("Jane Smith",), citations=0):
+    return {"id": pid, "title": title, "authors": list(authors), "citations": citations,
+            "pdf": "No PDF available", "external_ids": {"CorpusId": int(pid)}}
+
+def test_search_matches_titles_and_authors(tmp_path):
+    index = PaperIndex(str(tmp_path / "index.sqlite3"))
+    index.add_papers([
+        paper("1", "Graph Neural Networks for Molecules", citations=5),
+        paper("2", "Convolutional Networks for Images", authors=["Paul Erdős"], citations=50),
+    ])
+
+    assert [p["id"] for p in index.search("graph neural")] == ["1"]
+    assert [p["id"] for p in index.search("erdos")] == ["2"]
+    assert index.search("molecules")[0]["external_ids"] == {"CorpusId": 1}
+    assert index.autocomplete("conv") == ["Convolutional Networks for Images"]
+
+def test_refreshing_a_paper_replaces_its_text(tmp_path):
+    index = PaperIndex(str(tmp_path / "index.sqlite3"))
+    index.add_papers([paper("1", "Old Title")])
+    index.add_papers([paper("1", "New Title", citations=7)])
+
+    assert len(index) == 1
+    assert index.search("old") == []
+    assert [(p["title"], p["citations"]) for p in index.search("new")] == [("New Title", 7)]
+
+def test_get_papers_skips_unknown_ids(tmp_path):
+    index = PaperIndex(str(tmp_path / "index.sqlite3"))
+    index.add_papers([paper("1", "A"), paper("2", "B")])
+
+    assert sorted(p["id"] for p in index.get_papers(["2", "9", "1"])) == ["1", "2"]
+
+def test_rebuilds_an_index_from_before_external_content(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE papers (id TEXT PRIMARY KEY, title TEXT NOT NULL, authors TEXT NOT NULL,"
+        " citations INTEGER NOT NULL, pdf TEXT, external_ids TEXT, last_seen REAL NOT NULL)"
+    )
+    conn.execute("CREATE VIRTUAL TABLE papers_fts USING fts5(id UNINDEXED, title, authors)")
+    conn.execute("INSERT INTO papers VALUES ('1', 'Deep Learning', '[\"Jane Smith\"]', 3, NULL, '{}', 0)")
+    conn.execute("INSERT INTO papers_fts VALUES ('1', 'Deep Learning', 'Jane Smith')")
+    conn.commit()
+    conn.close()
+
+    index = PaperIndex(path)
+
+    assert [p["id"] for p in index.search("deep learning")] == ["1"]
+    assert [p["id"] for p in index.search("smith")] == ["1"]
@@ -0,0 +1,58 @@
+import api.intents as intents
+import api.paper_search as paper_search
+from api.paper_search import collect_search_results, iter_search_pages, normalize_query, rank_by_citations
+
+def fake_search(total):
+    """A search_papers stand-in over `total` papers whose citation counts rise with their position."""
+    requested = []
+
+    def search_papers(query, limit, offset=0):
+        requested.append((offset, limit))
+        return [{"id": str(i), "title": f"Paper {i}", "authors": [], "citations": i, "pdf": "No PDF available"} for i in range(offset, min(offset + limit, total))]
+    return search_papers, requested
+
+def test_normalize_query():
+    assert normalize_query("  Graph   Neural\tNetworks ") == "graph neural networks"
+
+def test_pages_arrive_in_order_and_stop_at_max_results(monkeypatch):
+    search, requested = fake_search(1000)
+    monkeypatch.setattr(paper_search, "search_papers", search)
+    pages = list(iter_search_pages("q", page_size=100, max_results=250, max_workers=2))
+
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert [p["id"] for page in pages for p in page] == [str(i) for i in range(250)]
+    assert sorted(requested) == [(0, 100), (100, 100), (200, 50)]
+
+def test_pages_stop_at_the_first_short_page(monkeypatch):
+    search, requested = fake_search(130)
+    monkeypatch.setattr(paper_search, "search_papers", search)
+
+    assert [len(page) for page in iter_search_pages("q", page_size=100, max_results=500, max_workers=1)] == [100, 30]
+    assert requested == [(0, 100), (100, 100)]
+
+def test_pages_stop_on_an_error(monkeypatch):
+    monkeypatch.setattr(paper_search, "search_papers", lambda query, limit, offset=0: {"error": "boom"})
+
+    assert list(iter_search_pages("q", page_size=100, max_results=300)) == []
+
+def test_rank_by_citations_merges_repeated_ids():
+    papers = [{"id": "a", "citations": 1}, {"id": "b", "citations": 9}, {"id": "a", "citations": 1}, {"id": "c"}]
+
+    assert [p["id"] for p in rank_by_citations(papers)] == ["b", "a", "c"]
+    assert [p["id"] for p in rank_by_citations(papers, top_k=1)] == ["b"]
+
+def test_collect_returns_the_top_cited_of_all_pages(monkeypatch):
+    search, _ = fake_search(300)
+    monkeypatch.setattr(paper_search, "search_papers", search)
+
+    assert len(collect_search_results("q", max_results=300, page_size=100)) == 300
+    assert [p["id"] for p in collect_search_results("q", max_results=300, page_size=100, top_k_by_citations=3)] == [
+        "299", "298", "297"]
+
+def test_handle_top_cited_formats_the_top_papers(monkeypatch):
+    search, _ = fake_search(300)
+    monkeypatch.setattr(paper_search, "search_papers", search)
+    response = intents.handle_top_cited("q", 2, max_results=300)
+
+    assert [p["id"] for p in response["papers"]] == ["299", "298"]
+    assert response["response"].startswith("**Here are some relevant research papers:**")
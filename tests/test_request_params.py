@@ -0,0 +1,31 @@
+import pytest
+
+from api.request_params import parse_id_list, parse_int_param
+
+def test_parse_int_param_defaults_and_clamps():
+    assert parse_int_param(None, 10) == 10
+    assert parse_int_param("", 10) == 10
+    assert parse_int_param("25", 10) == 25
+    assert parse_int_param(3.0, 10) == 3
+    assert parse_int_param(5000, 10, maximum=100) == 100
+
+@pytest.mark.parametrize("value", ["abc", "1.5", 2.5, True, [1], -1])
+def test_parse_int_param_rejects_malformed_values(value):
+    with pytest.raises(ValueError):
+        parse_int_param(value, 10)
+
+def test_parse_int_param_enforces_the_minimum():
+    with pytest.raises(ValueError):
+        parse_int_param(0, 10, minimum=1)
+
+def test_parse_id_list_accepts_strings_and_integers():
+    assert parse_id_list(["abc", 123, " def "], maximum=5) == ["abc", "123", "def"]
+
+@pytest.mark.parametrize("value", ["abcdef", [], {"id": 1}, ["a", None], ["a", True], ["a", " "], ["a", {"id": 1}]])
+def test_parse_id_list_rejects_anything_but_a_list_of_ids(value):
+    with pytest.raises(ValueError):
+        parse_id_list(value, maximum=5)
+
+def test_parse_id_list_caps_the_length():
+    with pytest.raises(ValueError, match="at most 2"):
+        parse_id_list(["a", "b", "c"], maximum=2)
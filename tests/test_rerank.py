@@ -0,0 +1,37 @@
+import numpy as np
+
+from api.rerank import rerank_papers, similarity_scores
+
+PAPERS = [
+    {"id": "1", "title": "A survey of cooking recipes", "citations": 1000},
+    {"id": "2", "title": "Graph neural networks for molecules", "citations": 5},
+    {"id": "3", "title": "Neural networks for images", "citations": 50},
+]
+
+def ids(papers):
+    return [paper["id"] for paper in papers]
+
+def test_similarity_scores_follow_title_overlap():
+    scores = similarity_scores("graph neural networks", PAPERS)
+
+    assert scores.shape == (3,)
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+    assert np.all(scores <= 1.0 + 1e-6)
+
+def test_abbreviations_match_their_expansion():
+    np.testing.assert_allclose(similarity_scores("GNN", PAPERS), similarity_scores("graph neural networks", PAPERS))
+
+def test_empty_inputs_score_zero():
+    assert similarity_scores("", PAPERS).tolist() == [0, 0, 0]
+    assert similarity_scores("graph", []).size == 0
+
+def test_rerank_orders_by_relevance_blended_with_citations():
+    assert ids(rerank_papers("graph neural networks", PAPERS, citation_weight=0.2)) == ["2", "3", "1"]
+    assert ids(rerank_papers("graph neural networks", PAPERS, citation_weight=1.0)) == ["1", "3", "2"]
+
+def test_ties_keep_upstream_order():
+    papers = [{"id": str(i), "title": "unrelated title", "citations": 0} for i in range(5)]
+
+    assert ids(rerank_papers("graph neural networks", papers)) == ["0", "1", "2", "3", "4"]
+    assert ids(rerank_papers("", PAPERS)) == ["1", "2", "3"]
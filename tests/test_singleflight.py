@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.singleflight import AsyncSingleFlight, SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)  # Let the followers reach the in-flight call
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["result"] * 5
+
+def test_errors_reach_every_waiting_caller():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", work)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["upstream down", "upstream down"]
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    counter = iter(range(10))
+
+    assert flight.do("k", lambda: next(counter)) == 0
+    assert flight.do("k", lambda: next(counter)) == 1
+
+def test_async_callers_share_one_call():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return calls, results
+
+    calls, results = asyncio.run(main())
+    assert calls == [1]
+    assert results == ["result"] * 5
+
+def test_async_errors_reach_every_caller():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(r) for r in results] == ["upstream down"] * 3
+
+def test_cancelled_leader_does_not_cancel_the_shared_work():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return 42
+
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == 42